@@ -0,0 +1 @@
+from .simulation import SimulationResult, Strategy, simulate
@@ -0,0 +1,146 @@
+import random
+import statistics
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .lib import Rules
+from .simulation import Strategy, Table, get_worker_seeds
+
+
+@dataclass
+class BankrollResult:
+    """Outcomes of independent sessions starting from the same stack.
+
+    Sessions are stored in compact arrays: the final stack, the number of
+    rounds played and whether the session ended in ruin.
+    """
+
+    initial_stack: float
+    stacks: array = field(default_factory=lambda: array("d"))
+    rounds: array = field(default_factory=lambda: array("l"))
+    ruined: array = field(default_factory=lambda: array("b"))
+
+    @property
+    def n_sessions(self) -> int:
+        return len(self.stacks)
+
+    @property
+    def risk_of_ruin(self) -> float:
+        """Fraction of sessions that lost the stack."""
+        if self.n_sessions == 0:
+            return 0.0
+        return sum(self.ruined) / self.n_sessions
+
+    def get_results(self) -> list[float]:
+        """Returns the net win of every session."""
+        return [stack - self.initial_stack for stack in self.stacks]
+
+    def get_quantiles(self, n: int = 20) -> list[float]:
+        """Returns `n - 1` cut points of the session results."""
+        return statistics.quantiles(self.get_results(), n=n)
+
+    def get_times_to_ruin(self) -> list[int]:
+        """Returns the number of rounds played in the ruined sessions."""
+        return [
+            n_rounds
+            for n_rounds, ruined in zip(self.rounds, self.ruined)
+            if ruined
+        ]
+
+    def merge(self, other: "BankrollResult") -> "BankrollResult":
+        """Combines sessions of two independent simulations."""
+        return BankrollResult(
+            self.initial_stack,
+            self.stacks + other.stacks,
+            self.rounds + other.rounds,
+            self.ruined + other.ruined,
+        )
+
+
+def simulate_bankroll(
+    rules: Rules,
+    strategy: Strategy | None = None,
+    n_sessions: int = 1000,
+    stack: float = 200,
+    max_rounds: int = 1000,
+    stop_loss: float | None = None,
+    win_goal: float | None = None,
+    seed: int | None = None,
+    workers: int = 1,
+    shoe: str = "standard",
+) -> BankrollResult:
+    """Plays independent sessions with basic strategy.
+
+    Every session starts from a freshly shuffled shoe. Bets are limited by
+    the session stack: a bet larger than the stack is reduced to it, and
+    insurance, doubles and splits are only taken if the stack covers them,
+    so the stack never goes negative. A session ends when the stack can
+    not cover the minimum bet (ruin), when `max_rounds` rounds have been
+    played, or when the stop-loss or the win goal is reached.
+
+    Args:
+        rules: Table rules.
+        strategy: Betting and counting strategy. Defaults to flat betting.
+        n_sessions: Number of sessions.
+        stack: Stack at the start of every session.
+        max_rounds: Maximum number of rounds in a session.
+        stop_loss: Stop the session after losing this amount.
+        win_goal: Stop the session after winning this amount.
+        seed: Seed of the random number generator.
+        workers: Number of processes. Sessions are split evenly between
+            the processes, see `simulation.simulate`.
+        shoe: Type of the shoe, see `lib.SHOES`.
+
+    Returns:
+        Final stacks and durations of the sessions.
+    """
+    strategy = strategy or Strategy()
+    limits = (stack, max_rounds, stop_loss, win_goal)
+    if workers <= 1:
+        job = (rules, strategy, n_sessions, limits, seed, shoe)
+        return _play_sessions(job)
+    seeds = get_worker_seeds(seed, workers)
+    chunk, remainder = divmod(n_sessions, workers)
+    jobs = [
+        (rules, strategy, chunk + (ind < remainder), limits, worker_seed, shoe)
+        for ind, worker_seed in enumerate(seeds)
+    ]
+    result = BankrollResult(stack)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for worker_result in executor.map(_play_sessions, jobs):
+            result = result.merge(worker_result)
+    return result
+
+
+def _play_sessions(job: tuple) -> BankrollResult:
+    rules, strategy, n_sessions, limits, seed, shoe = job
+    stack, max_rounds, stop_loss, win_goal = limits
+    low = stack - stop_loss if stop_loss is not None else -float("inf")
+    high = stack + win_goal if win_goal is not None else float("inf")
+    table = Table(
+        rules,
+        strategy,
+        rng=random.Random(seed),
+        shoe=shoe,
+        limit_to_stack=True,
+    )
+    player = table.player
+    result = BankrollResult(stack)
+    for _ in range(n_sessions):
+        table.new_shoe()
+        player.stack = stack
+        n_rounds = 0
+        ruined = False
+        while n_rounds < max_rounds:
+            table.play_round()
+            n_rounds += 1
+            if player.stack < strategy.bet:
+                ruined = True
+                break
+            if not low < player.stack < high:
+                break
+        result.stacks.append(player.stack)
+        result.rounds.append(n_rounds)
+        result.ruined.append(ruined)
+    return result
@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+
+from .lib import TRUE_COUNT_BUCKETS, Rules
+from .simulation import CountStatistics, Strategy, simulate
+
+
+@dataclass
+class RampResult:
+    ramp: dict[int, int]
+    ev: float  # Units per round
+    sd: float  # Units per round
+    rounds_per_hour: int = 100
+
+    @property
+    def score(self) -> float:
+        """Win per 100 rounds with optimal betting of a 10 000 unit bank."""
+        return 1e6 / self.n0 if self.ev > 0 else 0.0
+
+    @property
+    def n0(self) -> float:
+        """Number of rounds after which EV equals one standard deviation."""
+        return (self.sd / self.ev) ** 2 if self.ev else float("inf")
+
+    @property
+    def hourly_win(self) -> float:
+        """Expected win in units per hour."""
+        return self.ev * self.rounds_per_hour
+
+
+def measure(
+    rules: Rules,
+    n_rounds: int = 1_000_000,
+    seed: int | None = None,
+    workers: int = 1,
+    shoe: str = "standard",
+) -> CountStatistics:
+    """Plays one-unit bets and collects the results by true count.
+
+    Insurance is taken and deviations are played like with a counting
+    strategy. Rounds are played with `simulation.simulate`.
+    """
+    flat = dict.fromkeys(TRUE_COUNT_BUCKETS, 1)
+    strategy = Strategy(bet=1, count=True, ramp=flat)
+    return simulate(rules, strategy, n_rounds, seed, workers, shoe).by_count
+
+
+def evaluate_ramp(
+    stats: CountStatistics, ramp: dict[int, int], rounds_per_hour: int = 100
+) -> RampResult:
+    """Computes EV and standard deviation of a ramp from the statistics.
+
+    Results of a bucket scale linearly with the bet, so no rounds need
+    to be played.
+    """
+    n_total = sum(stats.n_rounds)
+    ev = second_moment = 0.0
+    for bucket, win, win_squared in zip(
+        TRUE_COUNT_BUCKETS, stats.win, stats.win_squared
+    ):
+        units = ramp[bucket]
+        ev += units * win
+        second_moment += units * units * win_squared
+    ev /= n_total
+    sd = (second_moment / n_total - ev**2) ** 0.5
+    return RampResult(ramp, ev, sd, rounds_per_hour)
+
+
+def optimize_ramp(
+    stats: CountStatistics, max_spread: int, rounds_per_hour: int = 100
+) -> RampResult:
+    """Finds the bet ramp with the best SCORE within a maximum spread.
+
+    Bets are whole units from 1 to `max_spread`. Without the spread limit
+    the optimal bet is proportional to EV / second moment of the bucket;
+    the candidates are such bets at different scales, limited to the
+    spread, rounded, and made non-decreasing with the count.
+    """
+    ev = stats.get_ev()
+    variance = stats.get_variance()
+    weights = [
+        max(e, 0.0) / (v + e * e) if v > 0 else 0.0
+        for e, v in zip(ev, variance)
+    ]
+    best = evaluate_ramp(
+        stats, dict.fromkeys(TRUE_COUNT_BUCKETS, 1), rounds_per_hour
+    )
+    max_weight = max(weights)
+    if max_weight == 0:
+        return best
+    for step in range(1, 401):
+        scale = max_spread / max_weight * step / 100
+        ramp = {}
+        units = 1
+        for bucket, weight in zip(TRUE_COUNT_BUCKETS, weights):
+            units = max(units, min(max_spread, max(1, round(scale * weight))))
+            ramp[bucket] = units
+        result = evaluate_ramp(stats, ramp, rounds_per_hour)
+        if result.score > best.score:
+            best = result
+    return best
@@ -2,7 +2,7 @@ import argparse
 import logging
 
 from blackjack_gui import cli, gui
-from blackjack_gui.lib import get_rules
+from blackjack_gui.lib import SHOES, get_rules
 
 
 def main():
@@ -16,6 +16,12 @@ def main():
         action="store_true",
         help="Count cards. Default is False. Can be used with --ai.",
     )
+    parser.add_argument(
+        "--computed-strategy",
+        action="store_true",
+        help="Use basic strategy computed for the rules instead of the "
+        "charts. Can be used with --ai.",
+    )
     parser.add_argument(
         "--bet", type=int, default=10, help="Bet size (1-100). Default is 10."
     )
@@ -67,8 +73,108 @@ def main():
         help="Running count. Default is 0. For testing purposes.",
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to play the rounds. Default is 1. "
+        "Only with --cli and --ai.",
+    )
+    parser.add_argument(
+        "--shoe",
+        type=str,
+        choices=list(SHOES),
+        default="standard",
+        help="Shoe implementation used with --cli. Compact shoe stores cards "
+        "as integers. Default is standard.",
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=None,
+        help="Simulate this many independent sessions starting from --stack "
+        "and report risk of ruin. --n-games is the maximum number of rounds "
+        "in a session. Only with --cli and --ai.",
+    )
+    parser.add_argument(
+        "--stop-loss",
+        type=float,
+        default=None,
+        help="End a session after losing this amount. Only with --sessions.",
+    )
+    parser.add_argument(
+        "--win-goal",
+        type=float,
+        default=None,
+        help="End a session after winning this amount. Only with --sessions.",
+    )
+    parser.add_argument(
+        "--max-spread",
+        type=int,
+        default=None,
+        help="Measure EV by true count with --n-games rounds and find the "
+        "bet ramp with the best SCORE within this spread. Only with --cli "
+        "and --ai.",
+    )
+    parser.add_argument(
+        "--generate-deviations",
+        type=int,
+        default=None,
+        metavar="N_STATES",
+        help="Generate count indices for the rules by simulating this many "
+        "shoes at each true count, and play them instead of the built-in "
+        "deviations. Only with --cli, --ai and --count.",
+    )
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        help="Write one record per round to this file. Files ending with "
+        ".csv are written as CSV, others as JSON Lines. Only with --cli.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the random number generator. Default is random.",
+    )
+
     args = parser.parse_args()
 
+    if args.workers > 1 and (
+        not args.cli
+        or not args.ai
+        or args.cards is not None
+        or args.dealer_cards is not None
+        or args.subset is not None
+        or args.record is not None
+    ):
+        parser.error(
+            "--workers requires --cli and --ai and can not be used with "
+            "--cards, --dealer-cards, --subset or --record"
+        )
+
+    if args.max_spread is not None and (not args.cli or not args.ai):
+        parser.error("--max-spread requires --cli and --ai")
+
+    if args.sessions is not None and (
+        not args.cli
+        or not args.ai
+        or args.cards is not None
+        or args.dealer_cards is not None
+        or args.subset is not None
+        or args.record is not None
+    ):
+        parser.error(
+            "--sessions requires --cli and --ai and can not be used with "
+            "--cards, --dealer-cards, --subset or --record"
+        )
+
+    if args.generate_deviations is not None and (
+        not args.cli or not args.ai or not args.count
+    ):
+        parser.error("--generate-deviations requires --cli, --ai and --count")
+
     args.rules = get_rules(args.rules)
 
     if args.cli:
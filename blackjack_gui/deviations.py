@@ -0,0 +1,317 @@
+import operator
+import random
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from .lib import CARDS, Card, Count, Dealer, Hand, Rules
+from .simulation import get_worker_seeds
+from .strategy import (
+    DOUBLE,
+    HARD,
+    HIT,
+    PAIR,
+    RANK,
+    SOFT,
+    SPLIT,
+    STAY,
+    SURRENDER,
+    Deviation,
+    StrategyTable,
+    get_strategy_table,
+)
+
+# Player cards, dealer upcard and the two plays to be compared
+Decision = tuple[tuple[str, ...], str, tuple[int, int]]
+
+# The Illustrious 18 without insurance
+DECISIONS: tuple[Decision, ...] = (
+    (("10", "6"), "10", (HIT, STAY)),
+    (("10", "5"), "10", (HIT, STAY)),
+    (("10", "10"), "5", (STAY, SPLIT)),
+    (("10", "10"), "6", (STAY, SPLIT)),
+    (("6", "4"), "10", (HIT, DOUBLE)),
+    (("10", "2"), "3", (HIT, STAY)),
+    (("10", "2"), "2", (HIT, STAY)),
+    (("6", "5"), "A", (HIT, DOUBLE)),
+    (("5", "4"), "2", (HIT, DOUBLE)),
+    (("6", "4"), "A", (HIT, DOUBLE)),
+    (("5", "4"), "7", (HIT, DOUBLE)),
+    (("10", "6"), "9", (HIT, STAY)),
+    (("10", "3"), "2", (HIT, STAY)),
+    (("10", "2"), "4", (HIT, STAY)),
+    (("10", "2"), "5", (HIT, STAY)),
+    (("10", "2"), "6", (HIT, STAY)),
+    (("10", "3"), "3", (HIT, STAY)),
+)
+
+TRUE_COUNTS = range(-6, 11)
+
+
+def get_ev_differences(
+    rules: Rules,
+    decisions: tuple[Decision, ...] = DECISIONS,
+    true_counts: range = TRUE_COUNTS,
+    n_states: int = 10000,
+    seed: int | None = None,
+    workers: int = 1,
+) -> list[list[float]]:
+    """Simulates the plays of each decision at different true counts.
+
+    For every true count, `n_states` shoes with that count are generated.
+    Both plays are played from the same shoe, and the rest of the hand
+    follows basic strategy.
+
+    Returns:
+        For each decision, the mean win of the second play minus the mean
+        win of the first play at each true count.
+    """
+    situations = list(product(decisions, true_counts))
+    seeds = get_worker_seeds(seed, len(situations))
+    jobs = [
+        (rules, decision, true_count, n_states, job_seed)
+        for (decision, true_count), job_seed in zip(situations, seeds)
+    ]
+    if workers <= 1:
+        differences = list(map(_simulate_decision, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            differences = list(executor.map(_simulate_decision, jobs))
+    n_counts = len(true_counts)
+    return [
+        differences[ind : ind + n_counts]
+        for ind in range(0, len(differences), n_counts)
+    ]
+
+
+def generate_deviations(
+    rules: Rules,
+    decisions: tuple[Decision, ...] = DECISIONS,
+    true_counts: range = TRUE_COUNTS,
+    n_states: int = 10000,
+    seed: int | None = None,
+    workers: int = 1,
+) -> tuple[Deviation, ...]:
+    """Finds the true count index of each decision by simulation.
+
+    The index is where the play that is not basic strategy becomes the
+    better one, found from a line fitted to the EV differences. Decisions
+    without such a count in `true_counts` are left out.
+
+    Returns:
+        Deviations in the format of `strategy.DEVIATIONS`.
+    """
+    table = get_strategy_table(rules)
+    deviations = []
+    differences = get_ev_differences(
+        rules, decisions, true_counts, n_states, seed, workers
+    )
+    for decision, diffs in zip(decisions, differences):
+        cards, upcard, plays = decision
+        hand = _get_hand(rules, cards)
+        basic = table.get_action(hand, Card(upcard, "clubs"), 1, Count(0, 0))
+        if basic not in plays:
+            continue
+        if basic == plays[1]:
+            diffs = [-diff for diff in diffs]
+        index = _find_index(true_counts, diffs)
+        if index is None:
+            continue
+        if _get_slope(true_counts, diffs) > 0:
+            compare = operator.ge
+        else:
+            compare = operator.lt
+        cls, total = _get_class(hand, plays)
+        action = plays[0] if basic == plays[1] else plays[1]
+        deviations.append(
+            (cls, total, RANK[upcard], "true_count", compare, index, action)
+        )
+    return tuple(deviations)
+
+
+def _find_index(true_counts: range, diffs: list[float]) -> int | None:
+    """Returns the true count where a line fitted to `diffs` crosses zero.
+
+    Returns None if the line does not cross zero within `true_counts`.
+    """
+    slope = _get_slope(true_counts, diffs)
+    if slope == 0:
+        return None
+    mean_tc = sum(true_counts) / len(true_counts)
+    mean_diff = sum(diffs) / len(diffs)
+    index = mean_tc - mean_diff / slope
+    if not true_counts[0] <= index <= true_counts[-1]:
+        return None
+    return round(index)
+
+
+def _get_slope(true_counts: range, diffs: list[float]) -> float:
+    """Returns the least squares slope of `diffs` as a function of count."""
+    mean_tc = sum(true_counts) / len(true_counts)
+    mean_diff = sum(diffs) / len(diffs)
+    covariance = sum(
+        (tc - mean_tc) * (diff - mean_diff)
+        for tc, diff in zip(true_counts, diffs)
+    )
+    return covariance / sum((tc - mean_tc) ** 2 for tc in true_counts)
+
+
+def _get_class(hand: Hand, plays: tuple[int, int]) -> tuple[int, int]:
+    cards = hand.cards
+    if SPLIT in plays:
+        return PAIR, RANK[cards[0].label]
+    return (HARD if hand.is_hard else SOFT), int(hand.sum)
+
+
+def _simulate_decision(job: tuple) -> float:
+    rules, (cards, upcard, plays), true_count, n_states, seed = job
+    rng = random.Random(seed)
+    table = get_strategy_table(rules)
+    up = Card(upcard, "clubs")
+    shoe = [card for card in CARDS for _ in range(rules.number_of_decks)]
+    for label in (*cards, upcard):
+        shoe.remove(Card(label, "clubs"))
+    seen_count = sum(Card(label, "clubs").hi_lo for label in (*cards, upcard))
+    total = 0.0
+    for _ in range(n_states):
+        deck = _get_deck(rng, shoe, true_count, seen_count)
+        first = _play(rules, table, cards, up, iter(deck), plays[0])
+        second = _play(rules, table, cards, up, iter(deck), plays[1])
+        total += second - first
+    return total / n_states
+
+
+def _get_deck(
+    rng: random.Random, shoe: list[Card], true_count: int, seen_count: int
+) -> list[Card]:
+    """Returns undealt cards of a shoe with the given true count.
+
+    Cards are discarded at random penetration and swapped between the
+    discards and the rest of the shoe until the running count matches.
+    """
+    n_cards = len(shoe)
+    while True:
+        n_discards = rng.randint(n_cards // 5, n_cards * 3 // 4)
+        n_left = n_cards - n_discards
+        target = round(true_count * n_left / 52) - seen_count
+        rng.shuffle(shoe)
+        discards, deck = shoe[:n_discards], shoe[n_discards:]
+        if _adjust_count(rng, discards, deck, target):
+            rng.shuffle(deck)
+            return deck
+
+
+def _adjust_count(
+    rng: random.Random, discards: list[Card], deck: list[Card], target: int
+) -> bool:
+    positions: list[dict[int, list[int]]] = []
+    for cards in (discards, deck):
+        by_count: dict[int, list[int]] = {-1: [], 0: [], 1: []}
+        for ind, card in enumerate(cards):
+            by_count[card.hi_lo].append(ind)
+        positions.append(by_count)
+    running_count = sum(card.hi_lo for card in discards)
+    while running_count != target:
+        step = 1 if target > running_count else -1
+        options = [
+            hi_lo
+            for hi_lo in (-1, 0, 1)
+            if -1 <= hi_lo + step <= 1
+            and positions[0][hi_lo]
+            and positions[1][hi_lo + step]
+        ]
+        if not options:
+            return False
+        hi_lo = rng.choice(options)
+        i = _pop_random(rng, positions[0][hi_lo])
+        j = _pop_random(rng, positions[1][hi_lo + step])
+        discards[i], deck[j] = deck[j], discards[i]
+        positions[0][hi_lo + step].append(i)
+        positions[1][hi_lo].append(j)
+        running_count += step
+    return True
+
+
+def _pop_random(rng: random.Random, items: list[int]) -> int:
+    ind = rng.randrange(len(items))
+    items[ind], items[-1] = items[-1], items[ind]
+    return items.pop()
+
+
+def _get_hand(rules: Rules, cards: tuple[str, ...]) -> Hand:
+    hand = Hand(rules)
+    for label in cards:
+        hand.deal(Card(label, "clubs"))
+    hand.bet = 1
+    return hand
+
+
+def _play(
+    rules: Rules,
+    table: StrategyTable,
+    cards: tuple[str, ...],
+    up: Card,
+    deck: Iterator[Card],
+    action: int,
+) -> float:
+    """Plays one hand starting with the action and returns the win."""
+    dealer = Dealer(rules.game_type)
+    dealer.deal(up)
+    dealer.deal(next(deck))
+    if rules.peek and dealer.is_blackjack:
+        return -1.0
+    if action == SURRENDER:
+        return -0.5
+    hand = _get_hand(rules, cards)
+    hands = [hand]
+    if action == SPLIT:
+        hands = []
+        for card in hand.cards:
+            split_hand = Hand(rules)
+            split_hand.bet = 1
+            split_hand.is_split_hand = True
+            split_hand.deal(card)
+            split_hand.deal(next(deck))
+            split_hand.is_hittable = card.label != "A"
+            hands.append(split_hand)
+        for split_hand in hands:
+            _play_basic(table, split_hand, up, deck, len(hands))
+    elif action == DOUBLE:
+        hand.bet = 2
+        hand.deal(next(deck))
+    elif action == HIT:
+        hand.deal(next(deck))
+        _play_basic(table, hand, up, deck, 1)
+    while not dealer.is_finished:
+        dealer.deal(next(deck))
+    return sum(_settle(hand, dealer) for hand in hands)
+
+
+def _play_basic(
+    table: StrategyTable,
+    hand: Hand,
+    up: Card,
+    deck: Iterator[Card],
+    n_hands: int,
+):
+    count = Count(0, 0.0)
+    while hand.is_hittable and hand.sum < 21:
+        action = table.get_action(hand, up, n_hands, count)
+        if action == DOUBLE and len(hand.cards) == 2:
+            if not hand.is_split_hand or hand.rules.double_after_split:
+                hand.bet *= 2
+                hand.deal(next(deck))
+                return
+        if action not in (HIT, DOUBLE, SURRENDER):
+            return
+        hand.deal(next(deck))
+
+
+def _settle(hand: Hand, dealer: Dealer) -> float:
+    if hand.sum > 21 or dealer.is_blackjack:
+        return -hand.bet
+    if dealer.sum > 21 or hand.sum > dealer.sum:
+        return hand.bet
+    if hand.sum < dealer.sum:
+        return -hand.bet
+    return 0.0
@@ -8,7 +8,6 @@ from .lib import Count
 from PIL import Image, ImageTk
 
 from .lib import (
-    Card,
     Dealer,
     Hand,
     Player,
@@ -129,7 +128,7 @@ class Game:
             self._hide_buttons()
             self.root.after(TIME_DELAY, self._end_round)
             return
-        self._handle_counts(hand, self.shoe)
+        self._handle_counts()
         if hand.sum > 21:
             self._hide(hand)
             self._hide_chips(hand)
@@ -168,7 +167,7 @@ class Game:
             self._hide_buttons()
             self.root.after(TIME_DELAY, self._end_round)
             return
-        self._handle_counts(hand, self.shoe)
+        self._handle_counts()
         if hand.is_over is True:
             self._hide(hand)
             self._hide_chips(hand)
@@ -211,7 +210,7 @@ class Game:
 
         self._hide_buttons(("surrender", "insurance"))
         new_hand = self.player.start_new_hand(self.bet)
-        split_card = hand.cards.pop()
+        split_card = hand.split()
         new_hand.deal(split_card)
         self._display_chip(new_hand, 0)
         self._display_stack()
@@ -245,7 +244,7 @@ class Game:
             if two_aces and not self.rules.resplit_aces:
                 rotate = True
             self._display_player_cards(hand, rotate_last=rotate)
-            self._handle_counts(hand, self.shoe)
+            self._handle_counts()
 
         self._resolve_next_hand()
 
@@ -271,9 +270,9 @@ class Game:
             self.shoe.arrange(self.dealer_cards)
         self.dealer.deal(self.shoe)
         self.dealer.deal(self.shoe)
-        self.dealer.cards[1].visible = False
+        self.shoe.hide_last_card()
         self._display_dealer_cards()
-        self._handle_counts(self.dealer.cards, self.shoe)
+        self._handle_counts()
         if self.cards:
             self.shoe.arrange(self.cards, randomize=True)
         elif self.subset is not None:
@@ -281,7 +280,7 @@ class Game:
             self.shoe.arrange(cards)
         hand.deal(self.shoe)
         hand.deal(self.shoe)
-        self._handle_counts(hand, self.shoe)
+        self._handle_counts()
         self._show()
         self.active_slot = hand.slot
         self._display_stack()
@@ -315,13 +314,13 @@ class Game:
             if not self._is_all_over() or self.dealer.insurance_bet > 0:
                 self.root.after(TIME_DELAY, self._reveal_dealer_hidden_card)
             else:
-                self._handle_counts(self.dealer.cards, self.shoe)
+                self._handle_counts()
                 self._payout()
 
     def _reveal_dealer_hidden_card(self, surrender: bool = False):
         self._display_dealer_cards(hide_second=False)
-        self.dealer.cards[1].visible = True
-        self._handle_counts(self.dealer.cards, self.shoe)
+        self.shoe.reveal_card()
+        self._handle_counts()
         if surrender:
             self._show_buttons(("deal",))
             self.components.slider.configure(state=tkinter.NORMAL)
@@ -340,17 +339,17 @@ class Game:
         if not self.dealer.is_finished:
             self.root.after(TIME_DELAY, self._dealer_draw_one_card)
         else:
-            self._handle_counts(self.dealer.cards, self.shoe)
+            self._handle_counts()
             self._payout()
 
     def _dealer_draw_one_card(self):
         self.dealer.deal(self.shoe)
         self._display_dealer_cards()
-        self._handle_counts(self.dealer.cards, self.shoe)
+        self._handle_counts()
         if not self.dealer.is_finished:
             self.root.after(TIME_DELAY, self._dealer_draw_one_card)
         else:
-            self._handle_counts(self.dealer.cards, self.shoe)
+            self._handle_counts()
             self._payout()
 
     def _payout(self):
@@ -424,21 +423,18 @@ class Game:
             else:
                 raise ValueError
             self._display_info(hand, result)
-            self._handle_counts(hand, self.shoe)
+            self._handle_counts()
         # show both dealer cards even if player busts
-        if (
-            len(self.dealer.cards) == 2
-            and self.dealer.cards[1].visible is False
-        ):
+        if len(self.dealer.cards) == 2 and self.shoe.has_face_down_card:
             self.dealer.is_finished = True
             self.root.after(TIME_DELAY, self._reveal_dealer_hidden_card, True)
         else:
             self._show_buttons(("deal",))
-            self._handle_counts(self.dealer.cards, self.shoe)
+            self._handle_counts()
             self.components.slider.configure(state=tkinter.NORMAL)
 
-    def _handle_counts(self, hand: Hand | list[Card], shoe: Shoe):
-        self.player.update_counts(hand, shoe)
+    def _handle_counts(self):
+        self.player.update_counts(self.shoe)
         true_count = int(self.player.count.true_count)
         self.check_button.count_text.set(
             f"Running count: {self.player.count.running_count}\nTrue count: {true_count}"
@@ -458,7 +454,7 @@ class Game:
 
     def _end_round(self):
         self._display_dealer_cards(hide_second=False)
-        self.dealer.cards[1].visible = True
+        self.shoe.reveal_card()
         self._payout()
 
     def _enable_correct_buttons(self, hand: Hand):
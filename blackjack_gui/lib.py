@@ -1,8 +1,64 @@
+from array import array
 from dataclasses import dataclass
+import math
 import random
 import tkinter
 from typing import List, Literal
 
+LABELS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A")
+SUITS = ("spades", "clubs", "diamonds", "hearts")
+VALUES: dict[str, int | tuple] = {
+    "2": 2,
+    "3": 3,
+    "4": 4,
+    "5": 5,
+    "6": 6,
+    "7": 7,
+    "8": 8,
+    "9": 9,
+    "10": 10,
+    "J": 10,
+    "Q": 10,
+    "K": 10,
+    "A": (1, 11),
+}
+HARD_VALUES = {
+    "2": 2,
+    "3": 3,
+    "4": 4,
+    "5": 5,
+    "6": 6,
+    "7": 7,
+    "8": 8,
+    "9": 9,
+    "10": 10,
+    "J": 10,
+    "Q": 10,
+    "K": 10,
+    "A": 1,
+}
+HI_LO = {
+    "2": 1,
+    "3": 1,
+    "4": 1,
+    "5": 1,
+    "6": 1,
+    "7": 0,
+    "8": 0,
+    "9": 0,
+    "10": -1,
+    "J": -1,
+    "Q": -1,
+    "K": -1,
+    "A": -1,
+}
+SYMBOLS = {
+    "spades": "\u2660",
+    "clubs": "\u2663",
+    "diamonds": "\u2666",
+    "hearts": "\u2665",
+}
+
 
 @dataclass
 class Rules:
@@ -23,35 +79,56 @@ class Count:
     true_count: float
 
 
+# True counts are grouped so that bucket k holds counts in (k - 1, k]
+TRUE_COUNT_BUCKETS = range(-5, 11)
+
+
+def get_true_count_bucket(true_count: float) -> int:
+    """Returns the bucket of a true count, see `TRUE_COUNT_BUCKETS`."""
+    bucket = math.ceil(true_count)
+    return min(max(bucket, TRUE_COUNT_BUCKETS[0]), TRUE_COUNT_BUCKETS[-1])
+
+
 class Card:
-    def __init__(self, label: str, suit: str, visible: bool = True):
-        self.label = label
-        self.suit = suit
-        self.value = self._get_value()
-        self.visible = visible
-        self.counted = False
-
-    def _get_value(self) -> int | tuple:
-        if self.label in ("2", "3", "4", "5", "6", "7", "8", "9", "10"):
-            return int(self.label)
-        if self.label in ("J", "Q", "K"):
-            return 10
-        if self.label == "A":
-            return 1, 11
-        raise ValueError("Bad label")
+    """Playing card.
+
+    Cards are immutable and shared: `Card("A", "spades")` always returns the
+    same instance. Per-shoe state, like whether the card has been counted,
+    is kept in the `Shoe`.
+    """
+
+    __slots__ = ("label", "suit", "value", "hard_value", "hi_lo", "_repr")
+    _cards: dict[tuple[str, str], "Card"] = {}
+
+    label: str
+    suit: str
+    value: int | tuple
+    hard_value: int  # Ace counted as 1
+    hi_lo: int  # Hi-Lo count value
+    _repr: str
+
+    def __new__(cls, label: str, suit: str):
+        card = cls._cards.get((label, suit))
+        if card is None:
+            if label not in VALUES:
+                raise ValueError("Bad label")
+            if suit not in SYMBOLS:
+                raise ValueError("Bad suit")
+            card = super().__new__(cls)
+            card.label = label
+            card.suit = suit
+            card.value = VALUES[label]
+            card.hard_value = HARD_VALUES[label]
+            card.hi_lo = HI_LO[label]
+            card._repr = f"{label}{SYMBOLS[suit]}"
+            cls._cards[(label, suit)] = card
+        return card
+
+    def __reduce__(self):
+        return Card, (self.label, self.suit)
 
     def __repr__(self) -> str:
-        if self.suit == "spades":
-            suit = "\u2660"
-        elif self.suit == "clubs":
-            suit = "\u2663"
-        elif self.suit == "diamonds":
-            suit = "\u2666"
-        elif self.suit == "hearts":
-            suit = "\u2665"
-        else:
-            raise ValueError("Bad suit")
-        return f"{self.label}{suit}"
+        return self._repr
 
 
 class Deck:
@@ -60,31 +137,22 @@ class Deck:
         self._build()
 
     def _build(self):
-        for suit in ["spades", "clubs", "diamonds", "hearts"]:
-            for v in (
-                "2",
-                "3",
-                "4",
-                "5",
-                "6",
-                "7",
-                "8",
-                "9",
-                "10",
-                "J",
-                "Q",
-                "K",
-                "A",
-            ):
+        for suit in SUITS:
+            for v in LABELS:
                 self.cards.append(Card(v, suit))
 
 
 class Shoe:
-    def __init__(self, n_decs: int):
+    def __init__(self, n_decs: int, rng: random.Random | None = None):
         self.cards: List[Card] = []
         self.n_cards = 0
         self.n_decs = n_decs
+        self.rng = rng if rng is not None else random.Random()
         self._n_cards_total = self.n_decs * 52
+        self._position = 0  # Index of the next card to be drawn
+        self._n_counted = 0  # Cards before this index have been counted
+        self._face_down = -1  # Index of the card dealt face down
+        self._revealed = -1  # Index of revealed card waiting to be counted
         self._build()
 
     def _build(self):
@@ -92,19 +160,30 @@ class Shoe:
             deck = Deck()
             for card in deck.cards:
                 self.cards.append(card)
-        random.shuffle(self.cards)
-        self.n_cards = len(self.cards)
+        self.rng.shuffle(self.cards)
+        self._reset()
+
+    def _reset(self):
+        self.n_cards = self._n_cards_total
+        self._position = 0
+        self._n_counted = 0
+        self._face_down = -1
+        self._revealed = -1
+
+    def _get_card(self, index: int) -> Card:
+        return self.cards[index]
 
     def draw(self) -> Card:
         """Draws a card from shoe."""
         if self.n_cards > 0:
-            card = self.cards.pop(0)
+            card = self.cards[self._position]
+            self._position += 1
             self.n_cards -= 1
             return card
         raise ValueError("Empty shoe!")
 
     def fill_discard_tray(self, progress: tkinter.Label) -> None:
-        fraction = (self._n_cards_total - self.n_cards) / self._n_cards_total
+        fraction = self._position / self._n_cards_total
         y = self.n_decs * 20
         if progress is not None:
             progress.place(
@@ -119,21 +198,104 @@ class Shoe:
                 [cards[i].split(";")[-1], cards[i + 1].split(";")[0]]
                 for i in range(len(cards) - 1)
             ]
-            cards = random.choice(options)
+            cards = self.rng.choice(options)
 
-        labels = [card.label for card in self.cards]
+        start = self._position
+        labels = [card.label for card in self.cards[start:]]
         if randomize and len(cards) > 1:
             # randomize the first two cards
-            cards = random.sample(cards[0:2], 2) + cards[2:]
+            cards = self.rng.sample(cards[0:2], 2) + cards[2:]
         for ind, card in enumerate(cards):
             indices = [i for i, x in enumerate(labels[ind:]) if x == str(card)]
-            shoe_ind = random.choice(indices) + ind
-            self.cards[shoe_ind], self.cards[ind] = (
-                self.cards[ind],
-                self.cards[shoe_ind],
+            shoe_ind = self.rng.choice(indices) + ind
+            self.cards[start + shoe_ind], self.cards[start + ind] = (
+                self.cards[start + ind],
+                self.cards[start + shoe_ind],
             )
             labels[shoe_ind], labels[ind] = labels[ind], labels[shoe_ind]
 
+    def hide_last_card(self):
+        """Turns the last drawn card face down, e.g. dealer's hole card."""
+        self._face_down = self._position - 1
+
+    def reveal_card(self):
+        """Turns the face-down card up so that it can be counted."""
+        if self._face_down < self._n_counted:
+            self._revealed = self._face_down
+        self._face_down = -1
+
+    @property
+    def has_face_down_card(self) -> bool:
+        return self._face_down >= 0
+
+    def get_uncounted(self) -> list[Card]:
+        """Returns visible drawn cards that have not been counted yet."""
+        cards = []
+        if self._revealed >= 0:
+            cards.append(self._get_card(self._revealed))
+            self._revealed = -1
+        for ind in range(self._n_counted, self._position):
+            if ind != self._face_down:
+                cards.append(self._get_card(ind))
+        self._n_counted = self._position
+        return cards
+
+
+class CompactShoe(Shoe):
+    """Shoe that stores cards as small integers (rank * 4 + suit).
+
+    The shoe is shuffled and rebuilt in place, and `Card` objects are
+    looked up only when cards are drawn.
+    """
+
+    def _build(self):
+        self.codes = array("B", range(len(LABELS) * len(SUITS))) * self.n_decs
+        self.reshuffle()
+
+    def reshuffle(self):
+        """Puts all cards back into the shoe and shuffles it in place."""
+        self.rng.shuffle(self.codes)
+        self._reset()
+
+    def _get_card(self, index: int) -> Card:
+        return CARDS[self.codes[index]]
+
+    def draw(self) -> Card:
+        """Draws a card from shoe."""
+        if self.n_cards > 0:
+            code = self.codes[self._position]
+            self._position += 1
+            self.n_cards -= 1
+            return CARDS[code]
+        raise ValueError("Empty shoe!")
+
+    def arrange(self, cards: list[str], randomize: bool = False):
+        """Arranges shoe so that next cards are the requested ones."""
+        if ";" in str(cards):
+            options = [
+                [cards[i].split(";")[-1], cards[i + 1].split(";")[0]]
+                for i in range(len(cards) - 1)
+            ]
+            cards = self.rng.choice(options)
+
+        start = self._position
+        ranks = [code >> 2 for code in self.codes[start:]]
+        if randomize and len(cards) > 1:
+            cards = self.rng.sample(cards[0:2], 2) + cards[2:]
+        for ind, card in enumerate(cards):
+            rank = LABELS.index(str(card))
+            indices = [i for i, x in enumerate(ranks[ind:]) if x == rank]
+            shoe_ind = self.rng.choice(indices) + ind
+            self.codes[start + shoe_ind], self.codes[start + ind] = (
+                self.codes[start + ind],
+                self.codes[start + shoe_ind],
+            )
+            ranks[shoe_ind], ranks[ind] = ranks[ind], ranks[shoe_ind]
+
+
+CARDS = [Card(label, suit) for label in LABELS for suit in SUITS]
+SHOES = {"standard": Shoe, "compact": CompactShoe}
+
 
 class Hand:
     def __init__(self, rules: Rules):
@@ -142,6 +304,8 @@ class Hand:
         self.sum: float = 0.0
         self.bet: int = 0
         self.is_hard: bool = True
+        self._hard_sum = 0  # Aces counted as 1
+        self._n_aces = 0
         self.is_hittable: bool = True  # if True, can receive more cards
         self.is_blackjack: bool = False
         self.is_over: bool = False
@@ -163,7 +327,10 @@ class Hand:
             self.cards.append(source.draw())
         else:
             self.cards.append(source)
-        self.sum, self.is_hard = evaluate_hand(self.cards)
+        card = self.cards[-1]
+        self._hard_sum += card.hard_value
+        self._n_aces += card.label == "A"
+        self.sum, self.is_hard = _get_sum(self._hard_sum, self._n_aces)
 
         if len(self.cards) == 2 and self.cards[0].value == self.cards[1].value:
             self.is_pair = True
@@ -186,6 +353,14 @@ class Hand:
         if self.sum == 21 and len(self.cards) == 2 and not self.is_split_hand:
             self.is_blackjack = True
 
+    def split(self) -> Card:
+        """Removes and returns the second card of a pair."""
+        card = self.cards.pop()
+        self._hard_sum -= card.hard_value
+        self._n_aces -= card.label == "A"
+        self.sum, self.is_hard = _get_sum(self._hard_sum, self._n_aces)
+        return card
+
     def __repr__(self) -> str:
         return format_hand(self.cards)
 
@@ -201,20 +376,26 @@ class Dealer:
         self.insurance_bet = 0.0
         self.even_money: bool = False
         self.has_ace: bool = False
+        self._hard_sum = 0  # Aces counted as 1
+        self._n_aces = 0
 
     def init_hand(self):
         self.cards = []
         self.sum = 0
+        self._hard_sum = 0
+        self._n_aces = 0
         self.is_blackjack = False
         self.is_finished = False
         self.is_over = False
         self.insurance_bet = 0
         self.even_money = False
 
-    def deal(self, shoe: Shoe):
-        card = shoe.draw()
+    def deal(self, source: Shoe | Card):
+        card = source.draw() if isinstance(source, Shoe) else source
         self.cards.append(card)
-        self.sum, is_hard = evaluate_hand(self.cards)
+        self._hard_sum += card.hard_value
+        self._n_aces += card.label == "A"
+        self.sum, is_hard = _get_sum(self._hard_sum, self._n_aces)
         self.has_ace = self.cards[0].label == "A"
         if self.sum == 17:
             if self.game_type == "s17":
@@ -272,24 +453,22 @@ class Player:
         self.count.running_count = 0
         self.count.true_count = 0.0
 
-    def update_counts(self, hand: Hand | list[Card], shoe: Shoe):
-        cards = hand.cards if isinstance(hand, Hand) else hand
-        for card in cards:
-            self._update_running_count(card)
-            self._update_true_count(shoe)
+    def update_counts(self, shoe: Shoe):
+        """Counts cards that have become visible since the previous call."""
+        for card in shoe.get_uncounted():
+            self.count.running_count += card.hi_lo
+        self._update_true_count(shoe)
 
     def _update_true_count(self, shoe: Shoe):
         n_decs_left = shoe.n_cards / 52
         self.count.true_count = self.count.running_count / n_decs_left
 
-    def _update_running_count(self, card: Card):
-        if not card.visible or card.counted:
-            return
-        if card.label == "A" or card.value == 10:
-            self.count.running_count -= 1
-        elif isinstance(card.value, int) and card.value <= 6:
-            self.count.running_count += 1
-        card.counted = True
+
+def _get_sum(hard_sum: int, n_aces: int) -> tuple[int, bool]:
+    """Returns the hand total and whether it is hard, like `evaluate_hand`."""
+    if n_aces > 0 and hard_sum <= 11:
+        return hard_sum + 10, False
+    return hard_sum, True
 
 
 def evaluate_hand(cards: list) -> tuple:
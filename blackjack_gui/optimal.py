@@ -0,0 +1,210 @@
+import hashlib
+import os
+from array import array
+from dataclasses import astuple
+from pathlib import Path
+
+from .lib import Rules
+from .probability import get_dealer_probabilities, get_full_counts
+from .strategy import (
+    DOUBLE,
+    HARD,
+    HIT,
+    PAIR,
+    SOFT,
+    SPLIT,
+    STAY,
+    SURRENDER,
+    TABLE_SIZE,
+    Deviation,
+    StrategyTable,
+    get_keys,
+)
+
+# Bump when the computation changes so that cached tables are rebuilt
+VERSION = 1
+
+
+class _Evaluator:
+    """Expected values of player actions against one dealer upcard.
+
+    Player hands are described by their hard total (Aces counted as 1) and
+    whether they contain an Ace. The player's draws come from a full shoe
+    without the upcard. Values are conditioned on the dealer not having
+    blackjack; without peek, `adjust` adds the bets lost to a dealer
+    blackjack.
+    """
+
+    def __init__(self, rules: Rules, upcard: int):
+        self.rules = rules
+        counts = list(get_full_counts(rules.number_of_decks))
+        counts[upcard - 1] -= 1
+        n_cards = sum(counts)
+        self.p = [n / n_cards for n in counts]
+        odds = get_dealer_probabilities(
+            tuple(counts), upcard, rules.game_type, peek=True
+        )
+        self.dealer = [odds[total] for total in range(17, 22)]
+        self.bust = odds["bust"]
+        self.blackjack = 0.0
+        if not rules.peek:
+            self.blackjack = get_dealer_probabilities(
+                tuple(counts), upcard, rules.game_type
+            )["blackjack"]
+        self._hit: dict[tuple[int, bool], float] = {}
+
+    def adjust(self, ev: float, risk: int) -> float:
+        """Includes dealer blackjack that takes `risk` units of bets."""
+        return (1 - self.blackjack) * ev - self.blackjack * risk
+
+    def stand(self, hard_sum: int, has_ace: bool) -> float:
+        total = _get_total(hard_sum, has_ace)
+        if total > 21:
+            return -1.0
+        ev = self.bust
+        for dealer_total, p in zip(range(17, 22), self.dealer):
+            if total > dealer_total:
+                ev += p
+            elif total < dealer_total:
+                ev -= p
+        return ev
+
+    def hit(self, hard_sum: int, has_ace: bool) -> float:
+        key = (hard_sum, has_ace)
+        if key not in self._hit:
+            ev = 0.0
+            for ind, p in enumerate(self.p):
+                new_sum, new_ace = hard_sum + ind + 1, has_ace or ind == 0
+                if _get_total(new_sum, new_ace) > 21:
+                    ev -= p
+                else:
+                    ev += p * max(
+                        self.stand(new_sum, new_ace),
+                        self.hit(new_sum, new_ace),
+                    )
+            self._hit[key] = ev
+        return self._hit[key]
+
+    def double(self, hard_sum: int, has_ace: bool) -> float:
+        return 2 * sum(
+            p * self.stand(hard_sum + ind + 1, has_ace or ind == 0)
+            for ind, p in enumerate(self.p)
+        )
+
+    def split(self, value: int) -> float:
+        """Splits a pair once. Resplitting is not taken into account."""
+        ev = 0.0
+        for ind, p in enumerate(self.p):
+            hard_sum, has_ace = value + ind + 1, value == 1 or ind == 0
+            if value == 1:
+                # Split Aces get only one card
+                ev += p * self.stand(hard_sum, has_ace)
+                continue
+            options = [
+                self.stand(hard_sum, has_ace),
+                self.hit(hard_sum, has_ace),
+            ]
+            if self.rules.double_after_split:
+                options.append(self.double(hard_sum, has_ace))
+            ev += p * max(options)
+        return 2 * ev
+
+
+def compute_actions(rules: Rules) -> array:
+    """Computes the EV-maximizing basic strategy for the rules.
+
+    Returns:
+        Action codes in the layout of `strategy.StrategyTable`.
+    """
+    evaluators = {
+        up: _Evaluator(rules, 1 if up == 11 else up) for up in range(2, 12)
+    }
+    actions = array("b", [HIT]) * TABLE_SIZE
+    for index, key in enumerate(get_keys()):
+        cls, total, up, can_double, stage, bucket = key
+        if cls == HARD and total >= 2:
+            hard_sum, has_ace = total, False
+        elif cls == SOFT and total >= 12:
+            hard_sum, has_ace = total - 10, True
+        elif cls == PAIR and 2 <= total <= 11:
+            value = 1 if total == 11 else total
+            hard_sum, has_ace = 2 * value, value == 1
+        else:
+            continue
+        evaluator = evaluators[up]
+        options = [
+            (STAY, evaluator.adjust(evaluator.stand(hard_sum, has_ace), 1)),
+            (HIT, evaluator.adjust(evaluator.hit(hard_sum, has_ace), 1)),
+        ]
+        if can_double:
+            ev = evaluator.double(hard_sum, has_ace)
+            options.append((DOUBLE, evaluator.adjust(ev, 2)))
+        if cls == PAIR and bucket < 2:
+            ev = evaluator.split(value)
+            options.append((SPLIT, evaluator.adjust(ev, 2)))
+        if (
+            rules.surrender == "2-10"
+            and up != 11
+            and stage == 0
+            and bucket == 0
+        ):
+            options.append((SURRENDER, -0.5))
+        actions[index] = max(options, key=lambda option: option[1])[0]
+    return actions
+
+
+def _get_total(hard_sum: int, has_ace: bool) -> int:
+    return hard_sum + 10 if has_ace and hard_sum <= 11 else hard_sum
+
+
+def get_cache_dir() -> Path:
+    """Returns the directory of cached strategy tables."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "blackjack-gui"
+
+
+def load_actions(rules: Rules, cache_dir: Path | None = None) -> array:
+    """Returns computed strategy, reading it from the disk cache if possible.
+
+    Newly computed strategies are written to the cache. Failing to write
+    the cache is not an error.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    key = hashlib.sha256(repr((VERSION, astuple(rules))).encode()).hexdigest()
+    path = cache_dir / f"strategy-{key[:16]}.bin"
+    actions = array("b")
+    try:
+        actions.frombytes(path.read_bytes())
+    except OSError:
+        pass
+    if len(actions) == TABLE_SIZE:
+        return actions
+    actions = compute_actions(rules)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(actions.tobytes())
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return actions
+
+
+_tables: dict[tuple, StrategyTable] = {}
+
+
+def get_computed_strategy_table(
+    rules: Rules, deviations: tuple[Deviation, ...] = ()
+) -> StrategyTable:
+    """Returns computed basic strategy for the rules as a lookup table.
+
+    `strategy.DEVIATIONS` are derived for the charted rules, so computed
+    tables have no deviations unless given, for example from
+    `deviations.generate_deviations`.
+    """
+    key = (astuple(rules), deviations)
+    if key not in _tables:
+        _tables[key] = StrategyTable(
+            rules, deviations, actions=load_actions(rules)
+        )
+    return _tables[key]
@@ -0,0 +1,106 @@
+from functools import lru_cache
+from typing import Iterable, Literal
+
+from .lib import Card
+
+# Dealer's final results, in the order of the returned probabilities
+OUTCOMES = (17, 18, 19, 20, 21, "bust", "blackjack")
+
+# Composition of the shoe: number of cards of each value, index 0 being
+# Aces and index 9 ten-valued cards.
+Counts = tuple[int, ...]
+
+
+def get_rank_counts(cards: Iterable[Card]) -> Counts:
+    """Returns the composition of the given cards."""
+    counts = [0] * 10
+    for card in cards:
+        counts[card.hard_value - 1] += 1
+    return tuple(counts)
+
+
+def get_full_counts(n_decks: int) -> Counts:
+    """Returns the composition of a full shoe."""
+    return (4 * n_decks,) * 9 + (16 * n_decks,)
+
+
+def get_dealer_probabilities(
+    counts: Counts,
+    upcard: int,
+    game_type: Literal["s17", "h17"],
+    peek: bool = False,
+) -> dict:
+    """Returns the exact probabilities of the dealer's final results.
+
+    Args:
+        counts: Composition of the remaining shoe, see `get_rank_counts`.
+            The upcard must not be included.
+        upcard: Value of the dealer's upcard, Ace being 1.
+        game_type: Whether the dealer hits soft 17.
+        peek: If True, the probabilities are conditioned on the dealer not
+            having blackjack, as after a peek.
+
+    Returns:
+        Probabilities keyed by `OUTCOMES`.
+    """
+    return dict(zip(OUTCOMES, _dealer_odds(counts, upcard, game_type, peek)))
+
+
+@lru_cache(maxsize=65536)
+def _dealer_odds(
+    counts: Counts,
+    upcard: int,
+    game_type: str,
+    peek: bool,
+) -> tuple[float, ...]:
+    n_cards = sum(counts)
+    odds = [0.0] * len(OUTCOMES)
+    for ind, n in enumerate(counts):
+        if n == 0:
+            continue
+        value = ind + 1
+        p = n / n_cards
+        if {upcard, value} == {1, 10}:
+            odds[-1] += p
+            continue
+        remaining = counts[:ind] + (n - 1,) + counts[ind + 1 :]
+        finals = _draw(
+            remaining, upcard + value, 1 in (upcard, value), game_type
+        )
+        for outcome in range(len(finals)):
+            odds[outcome] += p * finals[outcome]
+    if peek and odds[-1] > 0:
+        scale = 1 / (1 - odds[-1])
+        odds = [p * scale for p in odds[:-1]] + [0.0]
+    return tuple(odds)
+
+
+@lru_cache(maxsize=1 << 20)
+def _draw(
+    counts: Counts,
+    hard_sum: int,
+    has_ace: bool,
+    game_type: str,
+) -> tuple[float, ...]:
+    """Probabilities of 17-21 and bust from the current dealer hand."""
+    total = hard_sum + 10 if has_ace and hard_sum <= 11 else hard_sum
+    is_soft = total != hard_sum
+    if total > 21:
+        return (0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    if total >= 17 and not (total == 17 and is_soft and game_type == "h17"):
+        finals = [0.0] * 6
+        finals[total - 17] = 1.0
+        return tuple(finals)
+    n_cards = sum(counts)
+    finals = [0.0] * 6
+    for ind, n in enumerate(counts):
+        if n == 0:
+            continue
+        p = n / n_cards
+        remaining = counts[:ind] + (n - 1,) + counts[ind + 1 :]
+        result = _draw(
+            remaining, hard_sum + ind + 1, has_ace or ind == 0, game_type
+        )
+        for outcome in range(6):
+            finals[outcome] += p * result[outcome]
+    return tuple(finals)
@@ -0,0 +1,63 @@
+import csv
+
+FIELDS = (
+    "round",
+    "upcard",
+    "dealer",
+    "hands",
+    "actions",
+    "bets",
+    "insurance",
+    "net_win",
+    "running_count",
+    "true_count",
+    "penetration",
+)
+TEXT_FIELDS = ("upcard", "dealer", "hands", "actions", "bets")
+
+
+class RecordWriter:
+    """Streams one record per played round to a file.
+
+    Files ending with `.csv` are written as CSV with a header row, other
+    files as JSON Lines. Cards, actions and bets are separated by spaces
+    and split hands by `|`. Records are written through a buffered file,
+    so memory use does not grow with the number of rounds.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self.is_csv = path.endswith(".csv")
+        self.file = open(
+            path, "w", encoding="utf-8", newline="", buffering=buffer_size
+        )
+        if self.is_csv:
+            self._csv = csv.writer(self.file)
+            self._csv.writerow(FIELDS)
+        else:
+            # The text fields never contain quotes or backslashes, so the
+            # lines can be built without a JSON encoder.
+            self._template = (
+                "{"
+                + ",".join(
+                    f'"{name}":"%s"' if name in TEXT_FIELDS else f'"{name}":%r'
+                    for name in FIELDS
+                )
+                + "}\n"
+            )
+
+    def write(self, record: tuple):
+        """Writes a record with values in the order of `FIELDS`."""
+        if self.is_csv:
+            self._csv.writerow(record)
+        else:
+            self.file.write(self._template % record)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,683 @@
+import logging
+import math
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .lib import (
+    SHOES,
+    TRUE_COUNT_BUCKETS,
+    CompactShoe,
+    Dealer,
+    Hand,
+    Player,
+    Rules,
+    format_hand,
+    get_starting_hand,
+    get_true_count_bucket,
+)
+from .optimal import get_computed_strategy_table
+from .records import RecordWriter
+from .strategy import (
+    ACTIONS,
+    DOUBLE,
+    HIT,
+    SPLIT,
+    STAY,
+    SURRENDER,
+    Deviation,
+    get_strategy_table,
+)
+
+# Called with the decision ("insurance", "even-money", "surrender", "split",
+# "double" or "hit"), the hand and the basic strategy answer.
+Decide = Callable[[str, Hand, bool], bool]
+
+_N_BUCKETS = len(TRUE_COUNT_BUCKETS)
+
+
+@dataclass
+class Strategy:
+    bet: int = 10
+    count: bool = False
+    deviations: bool = True
+    # Use basic strategy computed for the rules instead of the charts
+    computed: bool = False
+    # Units bet in each true count bucket, see `lib.TRUE_COUNT_BUCKETS`
+    ramp: dict[int, int] | None = None
+    # Deviations played instead of `strategy.DEVIATIONS`, for example the
+    # indices of `deviations.generate_deviations`
+    indices: tuple[Deviation, ...] | None = None
+
+    def get_bet(self, true_count: float) -> int:
+        """Returns bet size for the next round."""
+        if self.count is True and self.ramp is not None:
+            return self.bet * self.ramp[get_true_count_bucket(true_count)]
+        if self.count is False or true_count <= 0:
+            return self.bet
+        if true_count < 5:
+            return self.bet * math.ceil(true_count)
+        if true_count < 6:
+            return 8 * self.bet
+        return 12 * self.bet
+
+
+@dataclass
+class CountStatistics:
+    """Round results aggregated by true count bucket.
+
+    The bucket is given by the true count when the bet was placed, see
+    `lib.TRUE_COUNT_BUCKETS`. Wins are in units of the initial bet of the
+    round, so that bets of different sizes can be combined. Insurance bets
+    are also collected in a bin of their own.
+    """
+
+    n_rounds: array = field(
+        default_factory=lambda: array("q", [0]) * _N_BUCKETS
+    )
+    win: array = field(default_factory=lambda: array("d", [0.0]) * _N_BUCKETS)
+    win_squared: array = field(
+        default_factory=lambda: array("d", [0.0]) * _N_BUCKETS
+    )
+    n_insurance: int = 0
+    insurance_win: float = 0.0
+    insurance_win_squared: float = 0.0
+
+    def add(self, true_count: float, net_win: float):
+        ind = get_true_count_bucket(true_count) - TRUE_COUNT_BUCKETS[0]
+        self.n_rounds[ind] += 1
+        self.win[ind] += net_win
+        self.win_squared[ind] += net_win * net_win
+
+    def add_insurance(self, net_win: float):
+        self.n_insurance += 1
+        self.insurance_win += net_win
+        self.insurance_win_squared += net_win * net_win
+
+    def merge(self, other: "CountStatistics") -> "CountStatistics":
+        """Combines statistics of two independent simulations."""
+        return CountStatistics(
+            array("q", map(sum, zip(self.n_rounds, other.n_rounds))),
+            array("d", map(sum, zip(self.win, other.win))),
+            array("d", map(sum, zip(self.win_squared, other.win_squared))),
+            self.n_insurance + other.n_insurance,
+            self.insurance_win + other.insurance_win,
+            self.insurance_win_squared + other.insurance_win_squared,
+        )
+
+    def get_frequencies(self) -> list[float]:
+        """Returns the fraction of rounds played in each bucket."""
+        n_total = sum(self.n_rounds)
+        return [n / n_total if n_total else 0.0 for n in self.n_rounds]
+
+    def get_ev(self) -> list[float]:
+        """Returns the mean win per round in each bucket."""
+        return [w / n if n else 0.0 for w, n in zip(self.win, self.n_rounds)]
+
+    def get_variance(self) -> list[float]:
+        """Returns the variance of the win per round in each bucket."""
+        return [
+            w2 / n - (w / n) ** 2 if n else 0.0
+            for w, w2, n in zip(self.win, self.win_squared, self.n_rounds)
+        ]
+
+
+@dataclass
+class SimulationResult:
+    n_rounds: int = 0
+    n_hands: int = 0
+    wagered: float = 0.0
+    net_win: float = 0.0
+    sum_of_squares: float = 0.0
+    decisions: dict = field(
+        default_factory=lambda: {"correct": 0, "incorrect": 0}
+    )
+    by_count: CountStatistics = field(default_factory=CountStatistics)
+
+    @property
+    def variance(self) -> float:
+        """Variance of the net win per round."""
+        if self.n_rounds == 0:
+            return 0.0
+        mean = self.net_win / self.n_rounds
+        return self.sum_of_squares / self.n_rounds - mean**2
+
+    def merge(self, other: "SimulationResult") -> "SimulationResult":
+        """Combines statistics of two independent simulations."""
+        return SimulationResult(
+            n_rounds=self.n_rounds + other.n_rounds,
+            n_hands=self.n_hands + other.n_hands,
+            wagered=self.wagered + other.wagered,
+            net_win=self.net_win + other.net_win,
+            sum_of_squares=self.sum_of_squares + other.sum_of_squares,
+            decisions={
+                key: self.decisions[key] + other.decisions[key]
+                for key in self.decisions
+            },
+            by_count=self.by_count.merge(other.by_count),
+        )
+
+
+class Table:
+    """Plays rounds of blackjack without prompts or delays.
+
+    Decisions follow basic strategy unless a `decide` callback is given.
+    With `trace`, the course of each round is logged on DEBUG level.
+    Otherwise the events go to a no-op sink and no messages are built.
+    With `recorder`, one record per round is written, see `records.FIELDS`.
+    With `limit_to_stack`, bets are capped at the player's stack, and
+    insurance, doubles and splits are only taken if the stack covers them.
+    """
+
+    def __init__(
+        self,
+        rules: Rules,
+        strategy: Strategy,
+        stack: float = 0,
+        rng: random.Random | None = None,
+        decide: Decide | None = None,
+        shoe: str = "standard",
+        trace: bool = False,
+        recorder: RecordWriter | None = None,
+        limit_to_stack: bool = False,
+    ):
+        self.rules = rules
+        self.limit_to_stack = limit_to_stack
+        self.trace = trace
+        self.log: Callable[..., None] = logging.debug if trace else _discard
+        self.strategy = strategy
+        self.rng = rng if rng is not None else random.Random()
+        self.decide = decide
+        get_table = (
+            get_computed_strategy_table
+            if strategy.computed
+            else get_strategy_table
+        )
+        if strategy.indices is None:
+            self.strategy_table = get_table(rules)
+        else:
+            self.strategy_table = get_table(rules, strategy.indices)
+        self.dealer = Dealer(rules.game_type)
+        self.player = Player(rules, stack)
+        self.shoe_type = SHOES[shoe]
+        self.shoe = self.shoe_type(rules.number_of_decks, rng=self.rng)
+        self.result = SimulationResult()
+        self.true_count = 0.0
+        self.bet = 0
+        self.recorder = recorder
+        self._actions: list[str] = []
+        self._round_start: tuple = ()
+
+    def play_round(
+        self,
+        player_cards: list[str] | None = None,
+        dealer_cards: list[str] | None = None,
+        subset: str | None = None,
+    ) -> float:
+        """Plays one round and returns the net win of the round."""
+        stack = self.player.stack
+        invested = self.player.invested
+        self._play(player_cards, dealer_cards, subset)
+        net_win = self.player.stack - stack
+        self.result.n_rounds += 1
+        self.result.n_hands += len(self.player.hands)
+        self.result.wagered += self.player.invested - invested
+        self.result.net_win += net_win
+        self.result.sum_of_squares += net_win**2
+        self.result.by_count.add(self.true_count, net_win / self.bet)
+        insurance_bet = self.dealer.insurance_bet
+        if insurance_bet > 0:
+            insurance_win = (
+                2 * insurance_bet
+                if self.dealer.is_blackjack
+                else -insurance_bet
+            )
+            self.result.by_count.add_insurance(insurance_win / self.bet)
+        if self.recorder is not None:
+            self.recorder.write(self._get_record(net_win))
+        return net_win
+
+    def _get_record(self, net_win: float) -> tuple:
+        dealer, hands = self.dealer, self.player.hands
+        return (
+            self.result.n_rounds,
+            repr(dealer.cards[0]),
+            " ".join(map(repr, dealer.cards)),
+            "|".join(" ".join(map(repr, hand.cards)) for hand in hands),
+            " ".join(self._actions),
+            " ".join([str(hand.bet) for hand in hands]),
+            dealer.insurance_bet,
+            net_win,
+            *self._round_start,
+        )
+
+    def _play(
+        self,
+        player_cards: list[str] | None,
+        dealer_cards: list[str] | None,
+        subset: str | None,
+    ):
+        if (
+            self.shoe.n_cards < 52
+            or player_cards is not None
+            or subset is not None
+        ):
+            self.new_shoe()
+        self.true_count = self.player.count.true_count  # When betting
+        bet = self.bet = self._get_bet()
+        if self.recorder is not None:
+            count, shoe = self.player.count, self.shoe
+            self._actions = []
+            self._round_start = (
+                count.running_count,
+                round(count.true_count, 3),
+                round(1 - shoe.n_cards / (shoe.n_decs * 52), 4),
+            )
+        hand = self._deal(bet, player_cards, dealer_cards, subset)
+        self._insurance(hand, bet)
+        if self._dealer_peek(hand):
+            return
+        if hand.is_blackjack is False:
+            self._surrender(hand, bet)
+            self._split(hand, bet)
+        self._play_hands(bet)
+        self._dealer_draw(dealer_cards)
+        self._payout()
+
+    def new_shoe(self):
+        """Shuffles all cards back into the shoe and resets the count."""
+        self._shuffle()
+        self.player.init_count()
+
+    def _shuffle(self):
+        if isinstance(self.shoe, CompactShoe):
+            self.shoe.reshuffle()
+        else:
+            self.shoe = self.shoe_type(self.rules.number_of_decks, self.rng)
+
+    def _get_bet(self) -> int:
+        if self.decide is not None:
+            bet = self.strategy.bet
+        else:
+            bet = self.strategy.get_bet(self.player.count.true_count)
+        if self.limit_to_stack:
+            bet = min(bet, math.floor(self.player.stack))
+        return bet
+
+    def _covers(self, amount: float) -> bool:
+        return not self.limit_to_stack or self.player.stack >= amount
+
+    def _ask(self, decision: str, hand: Hand, suggestion: bool) -> bool:
+        if self.decide is None:
+            answer = suggestion
+        else:
+            answer = self.decide(decision, hand, suggestion)
+        if self.recorder is not None:
+            if answer is True:
+                self._actions.append(decision)
+            elif decision == "hit":
+                self._actions.append("stay")
+        return answer
+
+    def _is_correct(self, correct_play: int | bool, action: int | bool):
+        if correct_play == action:
+            self.result.decisions["correct"] += 1
+        else:
+            self.result.decisions["incorrect"] += 1
+
+    def _get_correct_play(self, hand: Hand) -> int:
+        return self.strategy_table.get_action(
+            hand,
+            self.dealer.cards[0],
+            len(self.player.hands),
+            self.player.count,
+            deviations=self.strategy.deviations,
+        )
+
+    def _deal(
+        self,
+        bet: int,
+        player_cards: list[str] | None,
+        dealer_cards: list[str] | None,
+        subset: str | None,
+    ) -> Hand:
+        player, dealer, shoe = self.player, self.dealer, self.shoe
+        player.hands = []
+        hand = player.start_new_hand(bet)
+        dealer.init_hand()
+        if dealer_cards is not None:
+            shoe.arrange(dealer_cards)
+        dealer.deal(shoe)
+        player.update_counts(shoe)
+        dealer.deal(shoe)  # Hole card
+        shoe.hide_last_card()
+        self.log("Dealer: %s", dealer.cards[0])
+        if player_cards is not None:
+            shoe.arrange(player_cards)
+        elif subset is not None:
+            shoe.arrange(get_starting_hand(subset))
+        hand.deal(shoe)
+        hand.deal(shoe)
+        player.update_counts(shoe)
+        self.log("Player: %s", hand)
+        return hand
+
+    def _insurance(self, hand: Hand, bet: int):
+        dealer = self.dealer
+        if dealer.has_ace is False:
+            return
+        should_insure = self.player.count.true_count > 3
+        suggestion = should_insure and self.strategy.count
+        if hand.is_blackjack is False:
+            if not self._covers(bet / 2):
+                return
+            if self._ask("insurance", hand, suggestion):
+                self._is_correct(should_insure, True)
+                insurance_bet = bet / 2
+                self.player.stack -= insurance_bet
+                self.player.invested += insurance_bet
+                dealer.insurance_bet = insurance_bet
+        elif self._ask("even-money", hand, suggestion):
+            self._is_correct(should_insure, True)
+            dealer.even_money = True
+
+    def _dealer_peek(self, hand: Hand) -> bool:
+        dealer, player = self.dealer, self.player
+        if self.rules.peek is False or dealer.is_blackjack is False:
+            return False
+        if dealer.insurance_bet > 0:
+            self.log("You win insurance bet.")
+            player.stack += dealer.insurance_bet * 3
+        elif dealer.even_money is True:
+            player.stack += hand.bet * 2
+        elif hand.is_blackjack is True:
+            self.log("Game is a push.")
+            player.stack += hand.bet
+        else:
+            self.log("Dealer has BJ, you lose!")
+        self.shoe.reveal_card()
+        player.update_counts(self.shoe)
+        return True
+
+    def _surrender(self, hand: Hand, bet: int):
+        # Surrender can be done only here. And not against dealer's Ace.
+        if self.rules.surrender != "2-10" or self.dealer.has_ace:
+            return
+        correct_play = self._get_correct_play(hand)
+        if self._ask("surrender", hand, correct_play == SURRENDER):
+            self._is_correct(correct_play, SURRENDER)
+            hand.is_hittable = False
+            hand.surrender = True
+            self.player.stack += bet / 2
+
+    def _split(self, hand: Hand, bet: int):
+        player, shoe = self.player, self.shoe
+        done_splitting = False
+        while done_splitting is False:
+            if hand.surrender is True:
+                break
+            n_hands = len(player.hands)
+            for ind in range(n_hands):
+                hand = player.hands[ind]
+                if (
+                    hand.cards[0].value == hand.cards[1].value
+                    and hand.is_asked_to_split is False
+                    and hand.is_allowed_to_split is True
+                    and self._covers(bet)
+                ):
+                    correct_play = self._get_correct_play(hand)
+                    if self._ask("split", hand, correct_play == SPLIT):
+                        self._is_correct(correct_play, SPLIT)
+                        new_hand = player.start_new_hand(bet)
+                        split_card = hand.split()
+                        new_hand.deal(split_card)
+                        # Only one card more if split card is Ace
+                        # and this hand can not be doubled anymore
+                        for handy in (hand, new_hand):
+                            handy.deal(shoe)
+                            handy.is_split_hand = True
+                            handy.is_blackjack = False
+                            if handy.cards[0].label == "A":
+                                handy.is_hittable = False
+                            if (
+                                handy.cards[0].label == "A"
+                                and handy.cards[1].label == "A"
+                                and not self.rules.resplit_aces
+                            ):
+                                handy.is_allowed_to_split = False
+                        if self.trace:
+                            self.log("Player: %s", format_hand(player.hands))
+                    else:
+                        hand.is_asked_to_split = True
+                    if len(player.hands) == 4:
+                        break
+                    if all(
+                        not hand.is_allowed_to_split or not hand.is_pair
+                        for hand in player.hands
+                    ):
+                        break
+            done_splitting = True
+            for hand in player.hands:
+                if (
+                    hand.is_pair
+                    and not hand.is_asked_to_split
+                    and hand.is_allowed_to_split
+                ):
+                    done_splitting = False
+                player.update_counts(shoe)
+            if len(player.hands) == 4:
+                done_splitting = True
+
+    def _play_hands(self, bet: int):
+        player, shoe = self.player, self.shoe
+        for hand in player.hands:
+            hand_played = False
+            while hand_played is False:
+                if hand.surrender is True or hand.is_blackjack:
+                    break
+                if hand.is_split_hand and hand.sum != 21:
+                    self.log("You are playing hand: %s", hand)
+                if (
+                    len(hand.cards) == 2
+                    and hand.is_hittable is True
+                    and self._covers(bet)
+                ):
+                    # Doubling
+                    correct_play = self._get_correct_play(hand)
+                    if hand.sum == 21:
+                        hand.played = True
+                        break
+                    if self._ask("double", hand, correct_play == DOUBLE):
+                        player.stack -= bet
+                        hand.bet += bet
+                        player.invested += bet
+                        hand.deal(shoe)
+                        player.update_counts(shoe)
+                        # Hand can't be played anymore after doubling
+                        hand.is_hittable = False
+                        hand_played = True
+                        self._is_correct(correct_play, DOUBLE)
+                    elif correct_play != DOUBLE:
+                        self.result.decisions["correct"] += 1
+                    else:
+                        logging.info(
+                            "Incorrect play, correct play was %s",
+                            ACTIONS[correct_play],
+                        )
+                        self.result.decisions["incorrect"] += 1
+                if hand.is_hittable is True:
+                    # Hit or stay
+                    correct_play = self._get_correct_play(hand)
+                    # Can not surrender anymore, nor double if the stack
+                    # does not cover it
+                    suggestion = correct_play in (HIT, SURRENDER, DOUBLE)
+                    if self._ask("hit", hand, suggestion) is False:
+                        self._is_correct(correct_play, STAY)
+                        break
+                    self._is_correct(correct_play, HIT)
+                    hand.deal(shoe)
+                    player.update_counts(shoe)
+                else:
+                    hand_played = True
+                self.log("Player: %s", hand)
+                if hand.sum >= 21:
+                    hand_played = True
+
+    def _dealer_draw(self, dealer_cards: list[str] | None):
+        player, dealer, shoe = self.player, self.dealer, self.shoe
+        if dealer_cards is not None and len(dealer_cards) > 2:
+            shoe.arrange(dealer_cards[2:])
+        hit_dealer = False
+        for hand in player.hands:
+            if (
+                hand.is_over is False and hand.surrender is False
+            ) or dealer.insurance_bet > 0:
+                hit_dealer = True
+        if player.hands[0].is_blackjack is True:
+            # Player already won unless dealer can have BJ
+            hit_dealer = dealer.has_ace or dealer.cards[0].value == 10
+        if hit_dealer is True:
+            shoe.reveal_card()
+        while hit_dealer is True:
+            player.update_counts(shoe)
+            self.log("Dealer: %s", dealer)
+            if dealer.is_finished:
+                hit_dealer = False
+            if player.hands[0].is_blackjack is True and not dealer.is_blackjack:
+                hit_dealer = False
+            if hit_dealer is True:
+                dealer.deal(shoe)
+
+    def _payout(self):
+        player, dealer = self.player, self.dealer
+
+        # Even money
+        if dealer.even_money is True:
+            self.log("You win with even money.")
+            player.stack += player.hands[0].bet * 2
+            return
+
+        # Insurance
+        if dealer.is_blackjack is True and dealer.insurance_bet > 0:
+            self.log("You win insurance bet.")
+            player.stack += dealer.insurance_bet * 3
+
+        for hand in player.hands:
+            # Losing hands
+            if hand.surrender:
+                self.log("You lose by surrendering.")
+
+            elif hand.sum > 21:
+                self.log("Player: %s, you lose!", hand.sum)
+
+            elif (
+                dealer.is_blackjack is True
+                and hand.is_blackjack is False
+                and hand.is_triple_seven is False
+            ):
+                self.log(
+                    "Dealer: BJ, Player: %s, you lose to dealer BJ!", hand.sum
+                )
+
+            elif hand.sum < dealer.sum <= 21:
+                self.log(
+                    "Dealer: %s, Player: %s, you lose!", dealer.sum, hand.sum
+                )
+
+            # Even hands
+            elif dealer.is_blackjack is True and hand.is_blackjack is True:
+                self.log("Dealer: BJ, Player: BJ, game is a push.")
+                player.stack += hand.bet
+
+            elif (
+                hand.is_blackjack is False
+                and dealer.is_blackjack is False
+                and hand.sum == dealer.sum
+            ):
+                self.log(
+                    "Dealer: %s, Player: %s, game is a push.",
+                    dealer.sum,
+                    hand.sum,
+                )
+                player.stack += hand.bet
+
+            # Winning hands
+            elif hand.is_triple_seven is True:
+                self.log("You win with triple seven!")
+                player.stack += hand.bet * 3
+
+            elif hand.is_blackjack is True and dealer.is_blackjack is False:
+                self.log("You win with BJ!")
+                player.stack += hand.bet * 2.5
+
+            elif dealer.sum > 21:
+                self.log("Dealer: %s, you win!", dealer.sum)
+                player.stack += hand.bet * 2
+
+            elif dealer.sum < hand.sum:
+                self.log(
+                    "Dealer: %s, Player: %s, you win!", dealer.sum, hand.sum
+                )
+                player.stack += hand.bet * 2
+
+            else:
+                raise ValueError("Unknown result")
+
+
+def simulate(
+    rules: Rules,
+    strategy: Strategy | None = None,
+    n_rounds: int = 1000,
+    seed: int | None = None,
+    workers: int = 1,
+    shoe: str = "standard",
+) -> SimulationResult:
+    """Plays rounds with basic strategy and returns the statistics.
+
+    Args:
+        rules: Table rules.
+        strategy: Betting and counting strategy. Defaults to flat betting.
+        n_rounds: Number of rounds to be played.
+        seed: Seed of the random number generator.
+        workers: Number of processes. Rounds are split evenly between the
+            processes and each process gets its own random number stream
+            derived from `seed`.
+        shoe: Type of the shoe, see `lib.SHOES`.
+
+    Returns:
+        Statistics of the played rounds.
+    """
+    strategy = strategy or Strategy()
+    if workers <= 1:
+        return _simulate((rules, strategy, n_rounds, seed, shoe))
+    seeds = get_worker_seeds(seed, workers)
+    chunk, remainder = divmod(n_rounds, workers)
+    jobs = [
+        (rules, strategy, chunk + (ind < remainder), worker_seed, shoe)
+        for ind, worker_seed in enumerate(seeds)
+    ]
+    result = SimulationResult()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for worker_result in executor.map(_simulate, jobs):
+            result = result.merge(worker_result)
+    return result
+
+
+def _discard(*args):
+    pass
+
+
+def get_worker_seeds(seed: int | None, workers: int) -> list[int]:
+    """Derives independent and reproducible seeds for worker processes."""
+    master = random.Random(seed)
+    return [master.getrandbits(64) for _ in range(workers)]
+
+
+def _simulate(job: tuple) -> SimulationResult:
+    rules, strategy, n_rounds, seed, shoe = job
+    table = Table(rules, strategy, rng=random.Random(seed), shoe=shoe)
+    for _ in range(n_rounds):
+        table.play_round()
+    return table.result
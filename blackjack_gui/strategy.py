@@ -0,0 +1,216 @@
+import operator
+from array import array
+from dataclasses import astuple
+from itertools import combinations_with_replacement, product
+from typing import Callable, Iterator
+
+from .lib import (
+    Card,
+    Count,
+    Hand,
+    Rules,
+    evaluate_hand,
+    get_correct_play,
+)
+
+HIT, STAY, DOUBLE, SPLIT, SURRENDER = range(5)
+ACTIONS = ("hit", "stay", "double", "split", "surrender")
+
+HARD, SOFT, PAIR = range(3)
+
+# Pairs are indexed by the value of the card, Ace being 11
+RANK = {
+    "2": 2,
+    "3": 3,
+    "4": 4,
+    "5": 5,
+    "6": 6,
+    "7": 7,
+    "8": 8,
+    "9": 9,
+    "10": 10,
+    "J": 10,
+    "Q": 10,
+    "K": 10,
+    "A": 11,
+}
+
+# Count-based deviations from basic strategy:
+# (hand class, total, dealer card, count, comparison, index, action)
+Deviation = tuple[int, int, int, str, Callable, float, int]
+DEVIATIONS: tuple[Deviation, ...] = (
+    (HARD, 12, 2, "true_count", operator.ge, 3, STAY),
+    (HARD, 12, 3, "true_count", operator.ge, 2, STAY),
+    (HARD, 12, 4, "running_count", operator.lt, 0, HIT),
+    (HARD, 16, 10, "running_count", operator.gt, 0, STAY),
+    (HARD, 16, 10, "running_count", operator.le, 0, HIT),
+    (SOFT, 15, 4, "running_count", operator.lt, 0, HIT),
+)
+
+_N_TOTALS = 22
+_N_UPCARDS = 10
+_N_STAGES = 3  # First two cards, two cards of split hand, more cards
+_N_HANDS_BUCKETS = 3  # One hand, two or three hands, four hands
+TABLE_SIZE = 3 * _N_TOTALS * _N_UPCARDS * 2 * _N_STAGES * _N_HANDS_BUCKETS
+
+
+class StrategyTable:
+    """Strategy of `lib.get_correct_play` compiled into a lookup table.
+
+    Actions are returned as small integers, see `ACTIONS`.
+    """
+
+    def __init__(
+        self,
+        rules: Rules,
+        deviations: tuple[Deviation, ...] = DEVIATIONS,
+        actions: array | None = None,
+    ):
+        self.rules = rules
+        if actions is None:
+            self._table = array("b", [-1]) * TABLE_SIZE
+        else:
+            self._table = actions
+        self._deviations: dict[tuple, list] = {}
+        for cls, total, up, attr, compare, threshold, action in deviations:
+            key = (cls, total, up)
+            self._deviations.setdefault(key, []).append(
+                (attr == "true_count", compare, threshold, action)
+            )
+        if actions is None:
+            self._compile()
+
+    def get_action(
+        self,
+        hand: Hand,
+        dealer_card: Card,
+        n_hands: int,
+        count: Count,
+        deviations: bool = False,
+    ) -> int:
+        """Returns the correct play as an action code."""
+        cls, total, up, index = self._get_key(hand, dealer_card, n_hands)
+        action = self._table[index]
+        if action < 0:
+            # Not a reachable hand, ask the reference implementation
+            return ACTIONS.index(
+                get_correct_play(
+                    hand, dealer_card, n_hands, self.rules, count, deviations
+                )
+            )
+        if deviations and action != SURRENDER:
+            overrides = self._deviations.get((cls, total, up), ())
+            for use_true_count, compare, threshold, new_action in overrides:
+                value = (
+                    count.true_count if use_true_count else count.running_count
+                )
+                if compare(value, threshold):
+                    if new_action == DOUBLE and not _can_double(index):
+                        continue
+                    return new_action
+        return action
+
+    def _compile(self):
+        count = Count(0, 0.0)
+        for cards in _get_witness_hands():
+            n_cards = len(cards)
+            for is_split_hand in (False, True):
+                if n_cards > 2 and is_split_hand:
+                    continue
+                for is_hittable in (True, False):
+                    hand = _get_hand(cards, self.rules, is_split_hand)
+                    hand.is_hittable = is_hittable
+                    for up_label in RANK:
+                        up = Card(up_label, "clubs")
+                        for n_hands in (1, 2, 4):
+                            action = get_correct_play(
+                                hand, up, n_hands, self.rules, count
+                            )
+                            index = self._get_key(hand, up, n_hands)[3]
+                            self._table[index] = ACTIONS.index(action)
+
+    def _get_key(
+        self, hand: Hand, dealer_card: Card, n_hands: int
+    ) -> tuple[int, int, int, int]:
+        cards = hand.cards
+        n_cards = len(cards)
+        if n_cards == 2 and cards[0].value == cards[1].value:
+            cls = PAIR
+            total = RANK[cards[0].label]
+        else:
+            cls = HARD if hand.is_hard else SOFT
+            total = min(int(hand.sum), 21)
+        can_double = (
+            n_cards == 2
+            and hand.is_hittable
+            and not (hand.is_split_hand and not self.rules.double_after_split)
+        )
+        stage = 2 if n_cards > 2 else int(hand.is_split_hand)
+        bucket = 0 if n_hands == 1 else 2 if n_hands >= 4 else 1
+        up = RANK[dealer_card.label]
+        index = get_index(cls, total, up, can_double, stage, bucket)
+        return cls, total, up, index
+
+
+def get_index(
+    cls: int, total: int, up: int, can_double: bool, stage: int, bucket: int
+) -> int:
+    """Returns the position of a hand situation in the table."""
+    position = (cls * _N_TOTALS + total) * _N_UPCARDS + up - 2
+    position = (position * 2 + can_double) * _N_STAGES + stage
+    return position * _N_HANDS_BUCKETS + bucket
+
+
+def _can_double(index: int) -> bool:
+    return index // (_N_STAGES * _N_HANDS_BUCKETS) % 2 == 1
+
+
+def get_keys() -> Iterator[tuple[int, int, int, bool, int, int]]:
+    """Yields every hand situation of the table in index order.
+
+    A situation is (hand class, total, dealer card, can double, stage,
+    number of hands bucket). Dealer's Ace is 11.
+    """
+    return product(
+        range(3),
+        range(_N_TOTALS),
+        range(2, 2 + _N_UPCARDS),
+        (False, True),
+        range(_N_STAGES),
+        range(_N_HANDS_BUCKETS),
+    )
+
+
+def _get_witness_hands() -> list[tuple[str, ...]]:
+    """Returns two- and three-card hands covering every hand class."""
+    labels = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A")
+    hands: list[tuple[str, ...]] = []
+    for n_cards in (2, 3):
+        for cards in combinations_with_replacement(labels, n_cards):
+            the_sum, _ = evaluate_hand(
+                [Card(label, "clubs") for label in cards]
+            )
+            if the_sum <= 21:
+                hands.append(cards)
+    return hands
+
+
+def _get_hand(cards: tuple[str, ...], rules: Rules, is_split: bool) -> Hand:
+    hand = Hand(rules)
+    hand.cards = [Card(label, "clubs") for label in cards]
+    hand.sum, hand.is_hard = evaluate_hand(hand.cards)
+    hand.is_split_hand = is_split
+    return hand
+
+
+_tables: dict[tuple, StrategyTable] = {}
+
+
+def get_strategy_table(
+    rules: Rules, deviations: tuple[Deviation, ...] = DEVIATIONS
+) -> StrategyTable:
+    """Returns compiled strategy for the rules. Tables are built only once."""
+    key = (astuple(rules), deviations)
+    if key not in _tables:
+        _tables[key] = StrategyTable(rules, deviations)
+    return _tables[key]
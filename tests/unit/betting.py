@@ -0,0 +1,56 @@
+import pytest
+
+from blackjack_gui.betting import evaluate_ramp, measure, optimize_ramp
+from blackjack_gui.lib import (
+    TRUE_COUNT_BUCKETS,
+    get_rules,
+    get_true_count_bucket,
+)
+from blackjack_gui.simulation import CountStatistics, Strategy
+
+
+@pytest.mark.parametrize(
+    "true_count, bucket",
+    [(-12, -5), (-1.5, -1), (-0.5, 0), (0, 0), (0.1, 1), (3, 3), (15, 10)],
+)
+def test_true_count_bucket(true_count, bucket):
+    assert get_true_count_bucket(true_count) == bucket
+
+
+def test_ramp_bet():
+    ramp = dict.fromkeys(TRUE_COUNT_BUCKETS, 1) | {2: 4}
+    assert Strategy(bet=10, count=True, ramp=ramp).get_bet(1.5) == 40
+    assert Strategy(bet=10, count=True, ramp=ramp).get_bet(-3) == 10
+    assert Strategy(bet=10, count=False, ramp=ramp).get_bet(1.5) == 10
+
+
+@pytest.fixture(scope="module")
+def stats() -> CountStatistics:
+    return measure(get_rules("US"), n_rounds=20000, seed=14)
+
+
+def test_flat_ramp(stats):
+    flat = dict.fromkeys(TRUE_COUNT_BUCKETS, 1)
+    result = evaluate_ramp(stats, flat)
+    assert sum(stats.n_rounds) == 20000
+    assert result.ev == pytest.approx(sum(stats.win) / 20000)
+    assert result.hourly_win == pytest.approx(100 * result.ev)
+    doubled = evaluate_ramp(stats, dict.fromkeys(TRUE_COUNT_BUCKETS, 2))
+    assert doubled.ev == pytest.approx(2 * result.ev)
+    assert doubled.n0 == pytest.approx(result.n0)
+
+
+def test_optimize_ramp(stats):
+    result = optimize_ramp(stats, max_spread=8)
+    units = [result.ramp[bucket] for bucket in TRUE_COUNT_BUCKETS]
+    assert units == sorted(units)
+    assert 1 <= min(units) and max(units) <= 8
+    flat = evaluate_ramp(stats, dict.fromkeys(TRUE_COUNT_BUCKETS, 1))
+    assert result.score >= flat.score
+    assert result.score == pytest.approx(1e6 / result.n0)
+
+
+def test_merge(stats):
+    merged = stats.merge(stats)
+    assert list(merged.n_rounds) == [2 * n for n in stats.n_rounds]
+    assert merged.get_ev() == pytest.approx(stats.get_ev())
@@ -0,0 +1,87 @@
+import operator
+import random
+
+import pytest
+
+from blackjack_gui.deviations import (
+    _adjust_count,
+    _find_index,
+    _get_deck,
+    generate_deviations,
+)
+from blackjack_gui.lib import CARDS, Card, get_rules
+from blackjack_gui.simulation import Strategy, Table
+from blackjack_gui.strategy import (
+    DEVIATIONS,
+    HARD,
+    HIT,
+    PAIR,
+    SPLIT,
+    STAY,
+    get_strategy_table,
+)
+
+
+@pytest.mark.parametrize("true_count", [-6, 0, 3, 10])
+def test_get_deck(true_count):
+    rng = random.Random(1)
+    shoe = [card for card in CARDS for _ in range(6)]
+    shoe.remove(Card("10", "clubs"))
+    shoe.remove(Card("6", "clubs"))
+    for _ in range(20):
+        deck = _get_deck(rng, shoe, true_count, seen_count=0)
+        # The whole shoe counts to zero
+        running_count = -sum(card.hi_lo for card in deck)
+        assert running_count == round(true_count * len(deck) / 52)
+        assert 78 <= len(deck) <= 248
+
+
+def test_adjust_count():
+    rng = random.Random(2)
+    cards = [card for card in CARDS for _ in range(2)]
+    discards, deck = cards[:40], cards[40:]
+    assert _adjust_count(rng, discards, deck, 10)
+    assert sum(card.hi_lo for card in discards) == 10
+    assert sorted(discards + deck, key=repr) == sorted(cards, key=repr)
+    # All 40 high cards of two decks can not fit in 8 discards
+    discards, deck = cards[:8], cards[8:]
+    assert not _adjust_count(rng, discards, deck, -20)
+
+
+def test_find_index():
+    true_counts = range(-4, 5)
+    diffs = [0.01 * (tc - 2.4) for tc in true_counts]
+    assert _find_index(true_counts, diffs) == 2
+    diffs = [-0.02 * (tc + 1) for tc in true_counts]
+    assert _find_index(true_counts, diffs) == -1
+    assert (
+        _find_index(true_counts, [0.01 * tc + 1 for tc in true_counts]) is None
+    )
+    assert _find_index(true_counts, [0.0] * len(true_counts)) is None
+
+
+def test_generate_deviations():
+    decisions = (
+        (("10", "10"), "6", (STAY, SPLIT)),
+        (("10", "3"), "2", (HIT, STAY)),
+    )
+    deviations = generate_deviations(
+        get_rules("US"), decisions, range(-6, 11, 2), n_states=500, seed=0
+    )
+    split, hit = deviations
+    assert split[:4] == (PAIR, 10, 6, "true_count")
+    assert split[4] is operator.ge and 2 <= split[5] <= 6
+    assert split[6] == SPLIT
+    assert hit[:4] == (HARD, 13, 2, "true_count")
+    assert hit[4] is operator.lt and -4 <= hit[5] <= 1
+    assert hit[6] == HIT
+
+
+def test_table_uses_indices():
+    indices = ((HARD, 16, 10, "true_count", operator.ge, 2, STAY),)
+    rules = get_rules("US")
+    table = Table(rules, Strategy(count=True, indices=indices))
+    assert table.strategy_table is get_strategy_table(rules, indices)
+    assert table.strategy_table is not get_strategy_table(rules, DEVIATIONS)
+    for _ in range(100):
+        table.play_round()
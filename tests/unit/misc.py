@@ -1,8 +1,14 @@
+from itertools import product
+
 import pytest
 
 from blackjack_gui.lib import (
     Card,
+    Dealer,
+    Hand,
+    Shoe,
     evaluate_hand,
+    get_rules,
 )
 
 
@@ -57,3 +63,45 @@ from blackjack_gui.lib import (
 def test_evaluate_hand(cards, the_sum, is_hard):
     the_sum, is_hard = evaluate_hand(cards)
     assert evaluate_hand(cards) == (the_sum, is_hard)
+
+
+def test_card_is_flyweight():
+    card = Card("Q", "spades")
+    assert card is Card("Q", "spades")
+    assert card is not Card("Q", "hearts")
+    assert not hasattr(card, "__dict__")
+    assert card.value == 10
+    assert card.hi_lo == -1
+    assert repr(card) == "Q♠"
+    with pytest.raises(ValueError):
+        Card("1", "spades")
+    with pytest.raises(ValueError):
+        Card("A", "stars")
+
+
+@pytest.mark.parametrize("first", ["2", "7", "10", "A"])
+def test_incremental_hand_sum(first):
+    for labels in product(("2", "5", "9", "K", "A"), repeat=3):
+        hand = Hand(get_rules("US"))
+        dealer = Dealer("h17")
+        shoe = Shoe(1)
+        shoe.arrange([first, *labels])
+        cards = []
+        for _ in range(4):
+            dealer.deal(shoe)
+            cards.append(dealer.cards[-1])
+            hand.deal(cards[-1])
+            assert (hand.sum, hand.is_hard) == evaluate_hand(cards)
+            assert dealer.sum == evaluate_hand(cards)[0]
+        hand.split()
+        assert (hand.sum, hand.is_hard) == evaluate_hand(cards[:3])
+
+
+def test_hand_split():
+    hand = Hand(get_rules("US"))
+    hand.deal(Card("A", "clubs"))
+    hand.deal(Card("A", "hearts"))
+    assert hand.split() is Card("A", "hearts")
+    assert (hand.sum, hand.is_hard) == (11, False)
+    hand.deal(Card("K", "hearts"))
+    assert (hand.sum, hand.is_hard) == (21, False)
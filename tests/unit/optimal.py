@@ -0,0 +1,89 @@
+import operator
+
+import pytest
+
+from blackjack_gui.lib import Card, Count, Hand, Rules, get_rules
+from blackjack_gui.optimal import (
+    compute_actions,
+    get_computed_strategy_table,
+    load_actions,
+)
+from blackjack_gui.strategy import (
+    ACTIONS,
+    HARD,
+    HIT,
+    PAIR,
+    SOFT,
+    SPLIT,
+    STAY,
+    SURRENDER,
+    TABLE_SIZE,
+    StrategyTable,
+    get_keys,
+)
+
+
+@pytest.mark.parametrize("region", ["US", "Helsinki"])
+def test_computed_strategy_agrees_with_charts(region):
+    rules = get_rules(region)
+    actions = compute_actions(rules)
+    charts = StrategyTable(rules)._table
+    differences = set()
+    for index, key in enumerate(get_keys()):
+        cls, total, up, _, stage, bucket = key
+        if charts[index] < 0 or stage == 2 or bucket > 0:
+            continue
+        if actions[index] != charts[index]:
+            differences.add((cls, total, up, ACTIONS[actions[index]]))
+    # Marginal plays: A,2 vs 5 and, with early surrender, 7,7 vs 10
+    assert differences <= {(SOFT, 13, 5, "hit"), (PAIR, 7, 10, "surrender")}
+
+
+def test_computed_strategy_respects_rules():
+    rules = Rules(
+        game_type="h17",
+        surrender="no",
+        peek=True,
+        double_after_split=False,
+        number_of_decks=8,
+    )
+    actions = compute_actions(rules)
+    for index, (cls, _, _, _, _, bucket) in enumerate(get_keys()):
+        assert actions[index] != SURRENDER
+        if actions[index] == SPLIT:
+            assert cls == PAIR and bucket < 2
+
+
+def test_load_actions_uses_cache(tmp_path, monkeypatch):
+    rules = get_rules("US")
+    actions = load_actions(rules, tmp_path)
+    assert len(actions) == TABLE_SIZE
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def fail(rules):
+        raise AssertionError("Not cached")
+
+    monkeypatch.setattr("blackjack_gui.optimal.compute_actions", fail)
+    assert load_actions(rules, tmp_path) == actions
+
+
+def test_computed_strategy_has_no_chart_deviations(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    rules = Rules(
+        game_type="h17",
+        surrender="no",
+        peek=True,
+        double_after_split=False,
+        number_of_decks=8,
+    )
+    hand = Hand(rules)
+    hand.deal(Card("10", "clubs"))
+    hand.deal(Card("6", "clubs"))
+    up = Card("10", "hearts")
+    table = get_computed_strategy_table(rules)
+    for running_count in (-5, 5):
+        count = Count(running_count, running_count / 8)
+        assert table.get_action(hand, up, 1, count, deviations=True) == HIT
+    indices = ((HARD, 16, 10, "running_count", operator.gt, 0, STAY),)
+    table = get_computed_strategy_table(rules, indices)
+    assert table.get_action(hand, up, 1, Count(5, 0.6), deviations=True) == STAY
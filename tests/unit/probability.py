@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from blackjack_gui.lib import CARDS, Card
+from blackjack_gui.probability import (
+    OUTCOMES,
+    get_dealer_probabilities,
+    get_full_counts,
+    get_rank_counts,
+)
+
+
+def _remove(counts: tuple, *values: int) -> tuple:
+    counts_list = list(counts)
+    for value in values:
+        counts_list[value - 1] -= 1
+    return tuple(counts_list)
+
+
+@pytest.mark.parametrize("game_type", ["s17", "h17"])
+@pytest.mark.parametrize("upcard", range(1, 11))
+@pytest.mark.parametrize("peek", [True, False])
+def test_probabilities_sum_to_one(game_type, upcard, peek):
+    counts = _remove(get_full_counts(6), upcard)
+    odds = get_dealer_probabilities(counts, upcard, game_type, peek)
+    assert tuple(odds) == OUTCOMES
+    assert sum(odds.values()) == pytest.approx(1)
+    if peek or upcard not in (1, 10):
+        assert odds["blackjack"] == 0
+    else:
+        assert odds["blackjack"] > 0
+
+
+@pytest.mark.parametrize(
+    "upcard, game_type, outcome, expected",
+    [
+        (6, "s17", "bust", 0.4228),
+        (10, "s17", "blackjack", 0.0772),
+        (1, "s17", "blackjack", 0.3087),
+        (7, "s17", 17, 0.3692),
+    ],
+)
+def test_six_deck_values(upcard, game_type, outcome, expected):
+    counts = _remove(get_full_counts(6), upcard)
+    odds = get_dealer_probabilities(counts, upcard, game_type)
+    assert odds[outcome] == pytest.approx(expected, abs=1e-4)
+
+
+def test_h17_busts_more_with_six():
+    counts = _remove(get_full_counts(6), 6)
+    s17 = get_dealer_probabilities(counts, 6, "s17")
+    h17 = get_dealer_probabilities(counts, 6, "h17")
+    assert h17["bust"] > s17["bust"]
+    assert h17[17] < s17[17]
+
+
+def test_exact_small_shoe():
+    # Dealer has 6 and the shoe has one 10 and one 5: 6+10 draws the 5
+    counts = (0, 0, 0, 0, 1, 0, 0, 0, 0, 1)
+    odds = get_dealer_probabilities(counts, 6, "s17")
+    assert odds[21] == pytest.approx(1)
+
+
+def test_monte_carlo():
+    rng = random.Random(9)
+    deck = [card for card in CARDS if card is not Card("9", "spades")]
+    counts = get_rank_counts(deck)
+    assert counts == _remove(get_full_counts(1), 9)
+    odds = get_dealer_probabilities(counts, 9, "h17")
+    n_busts = 0
+    n_rounds = 20000
+    for _ in range(n_rounds):
+        cards = rng.sample(deck, 10)
+        hard_sum, has_ace = 9, False
+        for card in cards:
+            hard_sum += card.hard_value
+            has_ace = has_ace or card.label == "A"
+            total = hard_sum + 10 if has_ace and hard_sum <= 11 else hard_sum
+            if total >= 17:
+                break
+        n_busts += total > 21
+    assert n_busts / n_rounds == pytest.approx(odds["bust"], abs=0.01)
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from blackjack_gui.lib import (
+    LABELS,
+    SUITS,
+    CompactShoe,
+    Player,
+    Shoe,
+    get_rules,
+)
+
+
+@pytest.mark.parametrize("n_decs", [1, 2, 6, 8])
+def test_draw(n_decs):
+    shoe = Shoe(n_decs, rng=random.Random(1))
+    order = list(shoe.cards)
+    drawn = [shoe.draw() for _ in range(n_decs * 52)]
+    assert drawn == order
+    assert shoe.n_cards == 0
+    with pytest.raises(ValueError):
+        shoe.draw()
+
+
+@pytest.mark.parametrize(
+    "cards",
+    [
+        ["A", "K"],
+        ["10", "10", "10"],
+        ["2", "3", "4", "5", "6"],
+    ],
+)
+def test_arrange_after_draws(cards):
+    shoe = Shoe(6, rng=random.Random(2))
+    for _ in range(100):
+        shoe.draw()
+    shoe.arrange(cards)
+    assert [shoe.draw().label for _ in cards] == cards
+    assert shoe.n_cards == 6 * 52 - 100 - len(cards)
+
+
+@pytest.mark.parametrize("n_decs", [1, 6, 8])
+def test_compact_shoe(n_decs):
+    shoe = CompactShoe(n_decs, rng=random.Random(3))
+    cards = [shoe.draw() for _ in range(n_decs * 52)]
+    assert shoe.n_cards == 0
+    for label in LABELS:
+        for suit in SUITS:
+            n = sum(card.label == label and card.suit == suit for card in cards)
+            assert n == n_decs
+    codes = shoe.codes
+    shoe.reshuffle()
+    assert shoe.codes is codes
+    assert shoe.n_cards == n_decs * 52
+
+
+def test_compact_shoe_arrange():
+    shoe = CompactShoe(6, rng=random.Random(4))
+    for _ in range(50):
+        shoe.draw()
+    shoe.arrange(["A", "10", "J"])
+    assert [shoe.draw().label for _ in range(3)] == ["A", "10", "J"]
+
+
+@pytest.mark.parametrize("shoe_type", [Shoe, CompactShoe])
+def test_count_with_face_down_card(shoe_type):
+    shoe = shoe_type(6, rng=random.Random(5))
+    player = Player(get_rules("US"))
+    shoe.arrange(["5", "K", "2", "3"])
+    shoe.draw()
+    player.update_counts(shoe)
+    assert player.count.running_count == 1
+    shoe.draw()
+    shoe.hide_last_card()
+    assert shoe.has_face_down_card
+    shoe.draw()
+    shoe.draw()
+    player.update_counts(shoe)
+    assert player.count.running_count == 3
+    shoe.reveal_card()
+    assert not shoe.has_face_down_card
+    player.update_counts(shoe)
+    assert player.count.running_count == 2
+    player.update_counts(shoe)
+    assert player.count.running_count == 2
+    assert player.count.true_count == 2 / ((6 * 52 - 4) / 52)
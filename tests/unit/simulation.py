@@ -0,0 +1,173 @@
+import csv
+import json
+from random import Random
+
+import pytest
+
+from blackjack_gui import Strategy, simulate
+from blackjack_gui.bankroll import simulate_bankroll
+from blackjack_gui.lib import TRUE_COUNT_BUCKETS, get_rules
+from blackjack_gui.records import FIELDS, RecordWriter
+from blackjack_gui.simulation import Table
+
+
+@pytest.mark.parametrize("region", ["US", "Helsinki"])
+def test_simulate_is_reproducible(region):
+    rules = get_rules(region)
+    result1 = simulate(rules, n_rounds=500, seed=1)
+    result2 = simulate(rules, n_rounds=500, seed=1)
+    assert result1 == result2
+
+
+def test_simulate_statistics():
+    rules = get_rules("US")
+    result = simulate(rules, Strategy(bet=1), n_rounds=1000, seed=2)
+    assert result.n_rounds == 1000
+    assert result.n_hands >= 1000
+    assert result.wagered >= result.n_hands
+    assert result.variance > 0
+    assert sum(result.decisions.values()) > 0
+
+
+@pytest.mark.parametrize(
+    "true_count, bet",
+    [
+        (-2, 10),
+        (0, 10),
+        (0.5, 10),
+        (2.1, 30),
+        (4.9, 50),
+        (5.5, 80),
+        (7, 120),
+    ],
+)
+def test_bet_spread(true_count, bet):
+    assert Strategy(bet=10, count=True).get_bet(true_count) == bet
+    assert Strategy(bet=10, count=False).get_bet(true_count) == 10
+
+
+def test_parallel_simulation():
+    rules = get_rules("Helsinki")
+    result1 = simulate(rules, n_rounds=1001, seed=3, workers=2)
+    result2 = simulate(rules, n_rounds=1001, seed=3, workers=2)
+    assert result1 == result2
+    assert result1.n_rounds == 1001
+
+
+def test_merge():
+    rules = get_rules("US")
+    result1 = simulate(rules, n_rounds=300, seed=4)
+    result2 = simulate(rules, n_rounds=200, seed=5)
+    merged = result1.merge(result2)
+    assert merged.n_rounds == 500
+    assert merged.n_hands == result1.n_hands + result2.n_hands
+    assert merged.net_win == result1.net_win + result2.net_win
+    assert merged.decisions["correct"] == (
+        result1.decisions["correct"] + result2.decisions["correct"]
+    )
+
+
+def test_compact_shoe_simulation():
+    rules = get_rules("US")
+    result = simulate(rules, n_rounds=1000, seed=6, shoe="compact")
+    assert result.n_rounds == 1000
+
+
+@pytest.mark.parametrize("trace", [True, False])
+def test_trace(trace, caplog):
+    caplog.set_level("DEBUG")
+    table = Table(get_rules("US"), Strategy(), rng=Random(7), trace=trace)
+    table.play_round()
+    assert bool(caplog.records) is trace
+
+
+@pytest.mark.parametrize("suffix", ["jsonl", "csv"])
+def test_record(suffix, tmp_path):
+    path = str(tmp_path / f"rounds.{suffix}")
+    with RecordWriter(path) as recorder:
+        table = Table(
+            get_rules("US"), Strategy(), rng=Random(8), recorder=recorder
+        )
+        net_wins = [table.play_round() for _ in range(50)]
+    with open(path, encoding="utf-8") as f:
+        if suffix == "csv":
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f]
+    assert len(records) == 50
+    assert [float(record["net_win"]) for record in records] == net_wins
+    assert set(records[0]) == set(FIELDS)
+
+
+def test_computed_strategy_simulation(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    result = simulate(
+        get_rules("Europe"), Strategy(computed=True), n_rounds=500, seed=10
+    )
+    assert result.n_rounds == 500
+
+
+def test_bankroll():
+    rules = get_rules("US")
+    result = simulate_bankroll(
+        rules, Strategy(bet=10), n_sessions=50, stack=50, seed=11
+    )
+    assert result.n_sessions == 50
+    assert 0 < result.risk_of_ruin < 1
+    assert len(result.get_times_to_ruin()) == sum(result.ruined)
+    for stack, ruined in zip(result.stacks, result.ruined):
+        assert (stack < 10) == ruined
+    assert max(result.rounds) <= 1000
+
+
+def test_bankroll_with_counting():
+    rules = get_rules("US")
+    strategy = Strategy(bet=10, count=True)
+    result = simulate_bankroll(
+        rules, strategy, n_sessions=300, stack=100, seed=1
+    )
+    assert min(result.stacks) >= 0
+    for stack, ruined in zip(result.stacks, result.ruined):
+        assert (stack < 10) == ruined
+
+
+def test_bankroll_limits():
+    rules = get_rules("US")
+    result = simulate_bankroll(
+        rules, n_sessions=40, stack=100, stop_loss=30, win_goal=30, seed=12
+    )
+    assert all(abs(win) >= 30 for win in result.get_results())
+
+
+def test_parallel_bankroll():
+    rules = get_rules("Helsinki")
+    result1 = simulate_bankroll(rules, n_sessions=21, seed=13, workers=2)
+    result2 = simulate_bankroll(rules, n_sessions=21, seed=13, workers=2)
+    assert result1 == result2
+    assert result1.n_sessions == 21
+
+
+def test_count_statistics():
+    rules = get_rules("US")
+    flat = dict.fromkeys(TRUE_COUNT_BUCKETS, 1)
+    strategy = Strategy(bet=1, count=True, ramp=flat)
+    result = simulate(rules, strategy, n_rounds=3000, seed=15, workers=2)
+    by_count = result.by_count
+    assert sum(by_count.n_rounds) == 3000
+    assert sum(by_count.win) == pytest.approx(result.net_win)
+    assert sum(by_count.get_frequencies()) == pytest.approx(1)
+    assert all(variance >= 0 for variance in by_count.get_variance())
+    assert by_count.n_insurance > 0
+    assert by_count.insurance_win_squared >= by_count.insurance_win**2 / (
+        by_count.n_insurance
+    )
+
+
+def test_count_statistics_are_in_units():
+    rules = get_rules("US")
+    result = simulate(rules, Strategy(bet=10), n_rounds=2000, seed=16)
+    by_count = result.by_count
+    assert sum(by_count.win) * 10 == pytest.approx(result.net_win)
+    assert sum(by_count.win_squared) * 100 == pytest.approx(
+        result.sum_of_squares
+    )
@@ -0,0 +1,107 @@
+from itertools import combinations_with_replacement, product
+
+import pytest
+
+from blackjack_gui.lib import (
+    Card,
+    Count,
+    Hand,
+    Rules,
+    evaluate_hand,
+    get_correct_play,
+    get_rules,
+)
+from blackjack_gui.strategy import (
+    ACTIONS,
+    StrategyTable,
+    get_strategy_table,
+)
+
+LABELS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "K", "A")
+
+COUNTS = (
+    Count(-3, -1.5),
+    Count(-1, 0.5),
+    Count(0, 0),
+    Count(1, 1.9),
+    Count(2, 2),
+    Count(3, 3),
+    Count(8, 4),
+)
+
+
+def _get_hands():
+    for n_cards in (2, 3, 4):
+        for labels in combinations_with_replacement(LABELS, n_cards):
+            cards = [Card(label, "clubs") for label in labels]
+            if evaluate_hand(cards)[0] <= 21:
+                yield cards
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [
+        get_rules("US"),
+        get_rules("Europe"),
+        get_rules("Helsinki"),
+        Rules(game_type="h17", surrender="no", peek=True, number_of_decks=2),
+        Rules(
+            game_type="h17",
+            surrender="no",
+            peek=True,
+            double_after_split=False,
+            number_of_decks=4,
+        ),
+        Rules(
+            game_type="s17",
+            surrender="no",
+            peek=True,
+            double_after_split=False,
+            number_of_decks=4,
+        ),
+        Rules(
+            game_type="s17",
+            surrender="2-10",
+            peek=False,
+            double_after_split=False,
+            number_of_decks=4,
+        ),
+    ],
+)
+def test_strategy_table(rules: Rules):
+    table = StrategyTable(rules)
+    for cards in _get_hands():
+        for is_split_hand, is_hittable in product((False, True), repeat=2):
+            if len(cards) > 2 and is_split_hand:
+                continue
+            hand = Hand(rules)
+            hand.cards = cards
+            hand.sum, hand.is_hard = evaluate_hand(cards)
+            hand.is_split_hand = is_split_hand
+            hand.is_hittable = is_hittable
+            for label, n_hands in product(LABELS, (1, 2, 3, 4)):
+                dealer_card = Card(label, "hearts")
+                for count, deviations in [(COUNTS[2], False)] + [
+                    (count, True) for count in COUNTS
+                ]:
+                    action = table.get_action(
+                        hand, dealer_card, n_hands, count, deviations
+                    )
+                    correct_play = get_correct_play(
+                        hand, dealer_card, n_hands, rules, count, deviations
+                    )
+                    assert ACTIONS[action] == correct_play, (
+                        cards,
+                        dealer_card,
+                        n_hands,
+                        count,
+                    )
+
+
+def test_strategy_table_is_cached():
+    assert get_strategy_table(get_rules("US")) is get_strategy_table(
+        get_rules("US")
+    )
+    assert get_strategy_table(get_rules("US")) is not get_strategy_table(
+        get_rules("Helsinki")
+    )